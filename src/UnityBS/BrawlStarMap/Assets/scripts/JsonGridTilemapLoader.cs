@@ -8,8 +8,11 @@ public class TxtGridTilemapLoader : MonoBehaviour
     public TileBase WallTile;      // 1
     public TileBase BushTile;      // 2
     public TileBase SpawnATile;    // 3
-    public TileBase SpawnBTile;    // 4
-    public TileBase PowerItemTile; // 5
+    public TileBase CoverTile;     // 4
+    public TileBase WaterTile;     // 5
+    public TileBase BoxTile;       // 6
+    public TileBase SpawnBTile;    // 7
+    public TileBase PowerItemTile; // 8
 
     [Header("Input")]
     public TextAsset TxtMap;       // drag your .txt here
@@ -64,8 +67,11 @@ public class TxtGridTilemapLoader : MonoBehaviour
             case 1: return WallTile;
             case 2: return BushTile;
             case 3: return SpawnATile;
-            case 4: return SpawnBTile;
-            case 5: return PowerItemTile;
+            case 4: return CoverTile;
+            case 5: return WaterTile;
+            case 6: return BoxTile;
+            case 7: return SpawnBTile;
+            case 8: return PowerItemTile;
             default: return null; // unknown id -> skip
         }
     }
@@ -0,0 +1,113 @@
+"""
+Spawn balance: which spawn reaches each box, bush and central tile first.
+
+Every group of spawns floods the map at the same time, in one
+level-by-level BFS over passable tiles. A tile goes to the group whose
+frontier gets there first and is CONTESTED when two arrive on the same
+step, so one pass gives the per-group shortest-path fields where it
+matters (the nearer group and its distance). Target tiles that are not
+passable (boxes) are reached but not walked through.
+
+The fitness term floods from every spawn on its own: on a mirrored map
+the two teams always split the targets evenly, the players within a team
+do not.
+
+    result = team_balance(grid, [[s] for s in spawns], passable={"empty", "bush", "spawn"},
+                          targets={"boxes": box_idx, "bushes": bush_idx, "center": center_idx})
+    result.imbalance        # {"boxes": 0.2, ...}: spread of the groups' wins, 0 (even) to 1
+"""
+from itertools import chain
+
+from distance import UNREACHED
+
+CONTESTED = -2
+
+
+def flood_groups(mask, cols, groups, sinks=()):
+    """
+    (dist, owner) over flat indices: dist to the nearest spawn of any
+    group, owner the index of that group in groups, CONTESTED or
+    UNREACHED. sinks are impassable tiles that are still claimed when a
+    group reaches them.
+    """
+    n = len(mask)
+    dist = [UNREACHED] * n
+    owner = [UNREACHED] * n
+    sinks = set(sinks)
+    frontier = []
+    for group, spawns in enumerate(groups):
+        for i in spawns:
+            if dist[i] == UNREACHED:
+                dist[i] = 0
+                owner[i] = group
+                frontier.append(i)
+            elif owner[i] != group:
+                owner[i] = CONTESTED
+    last = cols - 1
+    d = 0
+    while frontier:
+        d += 1
+        nxt = []
+        for i in frontier:
+            group = owner[i]
+            x = i % cols
+            for j in (i - cols, i + cols, i - 1 if x else -1, i + 1 if x != last else -1):
+                if not 0 <= j < n:
+                    continue
+                if dist[j] == UNREACHED:
+                    if mask[j]:
+                        nxt.append(j)
+                    elif j not in sinks:
+                        continue
+                    dist[j] = d
+                    owner[j] = group
+                elif dist[j] == d and owner[j] != group:
+                    # reached by two groups on this step
+                    owner[j] = CONTESTED
+        frontier = nxt
+    return dist, owner
+
+
+class BalanceResult:
+    """Per-category target counts won by each group, and the resulting imbalance."""
+
+    def __init__(self, won, contested):
+        self.won = won                  # {category: [won by group 0, group 1, ...]}
+        self.contested = contested      # {category: targets reached by two groups at once}
+
+    @property
+    def imbalance(self):
+        # coefficient of variation of the wins over its maximum, sqrt(groups - 1)
+        # (one group wins everything); for two groups this is |a - b| / reached
+        out = {}
+        for category, counts in self.won.items():
+            reached = sum(counts) + self.contested[category]
+            if not reached or len(counts) < 2:
+                out[category] = 0.0
+                continue
+            mean = sum(counts) / len(counts)
+            sd = (sum((c - mean) ** 2 for c in counts) / len(counts)) ** 0.5
+            out[category] = sd * len(counts) / reached / (len(counts) - 1) ** 0.5
+        return out
+
+    def mean_imbalance(self):
+        values = list(self.imbalance.values())
+        return sum(values) / len(values) if values else 0.0
+
+
+def team_balance(grid, groups, passable, targets):
+    """
+    groups are lists of flat spawn indices (a team, or a single spawn);
+    targets maps a category name to flat indices. Impassable targets are
+    flooded as sinks.
+    """
+    cols = len(grid[0])
+    mask = [tile in passable for tile in chain.from_iterable(grid)]
+    sinks = [i for idx in targets.values() for i in idx if not mask[i]]
+    _, owner = flood_groups(mask, cols, groups, sinks)
+    won, contested = {}, {}
+    for category, idx in targets.items():
+        claimed = [owner[i] for i in idx]
+        won[category] = [claimed.count(g) for g in range(len(groups))]
+        contested[category] = claimed.count(CONTESTED)
+    return BalanceResult(won, contested)
@@ -0,0 +1,66 @@
+"""
+Time per map vs. map size.
+
+    python3 bench.py                    # 60 128 256
+    python3 bench.py 60 96 --repeat 10
+
+Every size uses GenerationProfile.for_size, so obstacle density stays
+comparable. Times are medians in milliseconds; the last column is the
+full per-map cost divided by the tile count, which should stay flat if
+generation scales linearly with map area.
+"""
+import argparse
+import random
+import statistics
+import time
+
+import ga
+from fitness import evaluate_map_fitness
+from map_sliders import GenerationProfile
+
+
+def _median_ms(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def bench_size(size, repeat, seed=0):
+    profile = GenerationProfile.for_size(size)
+    rng = random.Random(seed)
+    random.seed(seed)
+    maps = [ga.BrawlStarsMap.random_map(rng, profile=profile) for _ in range(repeat)]
+    it = iter(range(10 ** 9))
+
+    def random_map():
+        ga.BrawlStarsMap.random_map(rng, profile=profile)
+
+    def evaluate():
+        evaluate_map_fitness(maps[next(it) % len(maps)].map)
+
+    def offspring():
+        a, b = rng.sample(maps, 2) if len(maps) > 1 else (maps[0], maps[0])
+        a.crossover(b, rng).mutate(rng)
+
+    row = {
+        "random_map": _median_ms(random_map, repeat),
+        "evaluate": _median_ms(evaluate, repeat),
+        "offspring": _median_ms(offspring, repeat),
+    }
+    row["us_per_tile"] = (row["evaluate"] + row["offspring"]) * 1000 / (size * size)
+    return row
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("sizes", nargs="*", type=int, default=[60, 128, 256])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'size':>6} {'random_map':>11} {'evaluate':>9} {'offspring':>10} {'us/tile':>8}")
+    for size in args.sizes:
+        r = bench_size(size, args.repeat)
+        print(f"{size:>6} {r['random_map']:>11.1f} {r['evaluate']:>9.1f} {r['offspring']:>10.1f} {r['us_per_tile']:>8.2f}")
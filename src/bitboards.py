@@ -0,0 +1,185 @@
+"""
+Bitboards: one Python int per tile class, one bit per tile.
+
+Tile (x, y) is bit y * stride + x. The stride is cols rounded up past a
+multiple of 8, so every row has at least one always-zero guard bit
+(moving right off a row lands on a guard bit, not the next row) and rows
+start on byte boundaries (so mirroring the rows is a bytes reversal).
+Neighbourhood operations become a few shifts, ANDs and ORs, all running
+in C over machine words:
+
+    dilate      4-neighbour growth: b | b << 1 | b >> 1 | b << stride | b >> stride
+    flood       dilate and AND with the passable set until nothing changes
+    grow        square (Chebyshev) growth, e.g. the clearance halo of a corridor
+    spans       runs of set bits per row, for writing a board back as row slices
+    mirror      the partner of every tile under a symmetry.AXES mode
+
+    lay = layout(rows, cols)
+    passable = lay.board(grid, {"empty", "bush", "spawn"})
+    reached = lay.flood(lay.bit(x, y), passable)
+    reached.bit_count()                         # tiles reachable from (x, y)
+"""
+from functools import lru_cache
+
+from symmetry import HORIZONTAL, VERTICAL, canonical_half
+
+_ASCII = bytes.maketrans(b"\x00\x01", b"01")
+_REVERSE_BITS = bytes(int(f"{i:08b}"[::-1], 2) for i in range(256))
+
+
+class Layout:
+    """Bit positions of a rows x cols grid and the operations on its boards."""
+
+    def __init__(self, rows, cols):
+        self.rows, self.cols = rows, cols
+        self.stride = (cols // 8 + 1) * 8
+        self.nbytes = rows * self.stride // 8
+        self._pad = bytes(self.stride - cols)
+        self.full = self.rect(0, 0, cols - 1, rows - 1)
+
+    def bit(self, x, y):
+        return 1 << (y * self.stride + x)
+
+    def bits(self, positions):
+        """Board of the (x, y) positions."""
+        s = self.stride
+        b = 0
+        for x, y in positions:
+            b |= 1 << (y * s + x)
+        return b
+
+    def rect(self, x0, y0, x1, y1):
+        """Board of the inclusive rectangle, clipped to the grid."""
+        x0, y0 = max(0, x0), max(0, y0)
+        x1, y1 = min(self.cols - 1, x1), min(self.rows - 1, y1)
+        if x0 > x1 or y0 > y1:
+            return 0
+        row = ((1 << (x1 - x0 + 1)) - 1) << x0
+        b = 0
+        for y in range(y0, y1 + 1):
+            b |= row << (y * self.stride)
+        return b
+
+    def from_mask(self, mask):
+        """Board of a flat row-major 0/1 mask (kernels.mask_of)."""
+        c, pad = self.cols, self._pad
+        rows = b"".join([bytes(mask[i:i + c]) + pad for i in range(0, len(mask), c)])
+        # bit 0 is the last character of the binary string
+        return int(rows.translate(_ASCII)[::-1], 2)
+
+    def board(self, grid, tiles):
+        """Board of the tiles whose type is in tiles."""
+        contains = frozenset(tiles).__contains__
+        pad = self._pad
+        rows = b"".join([bytes(map(contains, row)) + pad for row in grid])
+        return int(rows.translate(_ASCII)[::-1], 2)
+
+    def boards(self, grid, classes):
+        """{tile: board} for every tile type in classes."""
+        return {tile: self.board(grid, (tile,)) for tile in classes}
+
+    def positions(self, b):
+        """(x, y) of every set bit, in row-major order."""
+        s = self.stride
+        text = bin(b)[:1:-1]                    # bit 0 first
+        out = []
+        i = text.find("1")
+        while i != -1:
+            out.append((i % s, i // s))
+            i = text.find("1", i + 1)
+        return out
+
+    def spans(self, b):
+        """(y, x0, x1) for every run of set bits, x1 exclusive, in row-major order."""
+        s, row_bits = self.stride, (1 << self.cols) - 1
+        for y in range(self.rows):
+            r = (b >> (y * s)) & row_bits
+            while r:
+                low = r & -r
+                top = r + low                   # carries through the run
+                x0, x1 = low.bit_length() - 1, (top & -top).bit_length() - 1
+                yield y, x0, x1
+                r &= -1 << x1
+
+    def test(self, b, x, y):
+        return b >> (y * self.stride + x) & 1
+
+    def dilate(self, b):
+        """b plus its 4-neighbours."""
+        s = self.stride
+        return (b | b << 1 | b >> 1 | b << s | b >> s) & self.full
+
+    def grow(self, b, radius):
+        """b plus every tile within Chebyshev distance radius (a square around each bit)."""
+        s, full = self.stride, self.full
+        # mask every round: there is only one guard bit per row for sure
+        for _ in range(radius):
+            b = (b | b << 1 | b >> 1) & full
+        for _ in range(radius):
+            b |= b << s | b >> s
+        return b & full
+
+    def flood(self, seed, mask):
+        """
+        Everything 4-connected to seed through mask. Seed bits are kept and
+        expanded even outside mask. Each round also runs carries along the
+        rows (m + s spreads a seed bit up through a run of ones), so a
+        straight corridor fills in one round instead of one per tile.
+        """
+        s = self.stride
+        full = self.full
+        mask &= full
+        reached = seed
+        while True:
+            grown = (reached | reached << 1 | reached >> 1 | reached << s | reached >> s) & mask
+            inside = grown | (reached & mask)
+            grown |= ((mask + inside) ^ mask) & mask | reached
+            if grown == reached:
+                return reached
+            reached = grown
+
+    def component_sizes(self, mask):
+        """Sizes of the 4-connected components of mask, lowest bit first."""
+        mask &= self.full
+        sizes = []
+        while mask:
+            part = self.flood(mask & -mask, mask)
+            sizes.append(part.bit_count())
+            mask &= ~part
+        return sizes
+
+    def mirror(self, b, axis):
+        """b with every tile moved to its symmetry.mirror partner."""
+        data = b.to_bytes(self.nbytes, "little")
+        if axis == HORIZONTAL:
+            return int.from_bytes(self._reverse_rows(data), "little")
+        # reversing all the bits turns the board by 180 degrees, with the
+        # padding that ended each row now at its start; a vertical mirror
+        # then puts the rows back in order
+        data = data.translate(_REVERSE_BITS)[::-1]
+        if axis == VERTICAL:
+            data = self._reverse_rows(data)
+        return int.from_bytes(data, "little") >> (self.stride - self.cols)
+
+    def _reverse_rows(self, data):
+        step = self.stride // 8
+        return b"".join([data[i:i + step] for i in range(len(data) - step, -1, -step)])
+
+    def half(self, axis):
+        """Board of the canonical half that generation paints."""
+        y0, y1, x0, x1 = canonical_half(self.rows, self.cols, axis)
+        return self.rect(x0, y0, x1, y1)
+
+    def matching_pairs(self, boards, axis):
+        """symmetry.matching_pairs from the boards of every tile type present."""
+        half = self.half(axis)
+        return sum((b & self.mirror(b, axis) & half).bit_count() for b in boards)
+
+
+@lru_cache(maxsize=None)
+def layout(rows, cols):
+    return Layout(rows, cols)
+
+
+def layout_of(grid):
+    return layout(len(grid), len(grid[0]))
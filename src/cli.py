@@ -0,0 +1,258 @@
+"""
+Command line entry point for the map tools.
+
+    python3 cli.py generate --time-budget 5 --out best_map.txt
+    python3 cli.py generate --time-budget 20 --multires 4
+    python3 cli.py generate --size 240 --time-budget 60 --regions --workers 8
+    python3 cli.py elites --iterations 2000 --out-dir elites
+    python3 cli.py pareto --population 200 --generations 30 --out-dir pareto
+    python3 cli.py evaluate best_map.txt
+    python3 cli.py export best_map.txt --out best_map.json
+    python3 cli.py view best_map.txt [--ascii | --save preview.png]
+    python3 cli.py render maps/*.txt --out-dir previews [--sheet sheet.png]
+
+Only argparse is imported up front. ga/fitness are imported by the
+subcommands that use them and matplotlib only by `view` without --ascii,
+numpy only by `render`, so short jobs (`evaluate`, `--help`) do not pay for modules they never
+touch; concurrent.futures (~8 ms) only comes in with the parallel runs.
+Wall clock with a warm bytecode cache, on top of a bare interpreter:
+`cli.py --help` ~20 ms (argparse) and `cli.py evaluate <one map>` ~55 ms,
+of which ~25 ms imports ga/fitness and ~14 ms is the evaluation itself
+(mostly the gameplay terms). Measured ~80 ms and ~115 ms against ~60 ms
+for a bare interpreter. Check what a command imports with
+`python3 -X importtime cli.py evaluate best_map.txt`.
+"""
+import argparse
+import sys
+
+import symmetry     # no dependencies, cheap
+
+
+def cmd_generate(args):
+    import ga
+    from map_sliders import GenerationProfile, DEFAULT_PROFILE
+
+    profile = GenerationProfile.from_file(args.profile) if args.profile else DEFAULT_PROFILE
+    if args.size and args.size != profile.map_size:
+        profile = GenerationProfile.for_size(args.size, profile)
+    if args.axis:
+        profile = profile.with_overrides(symmetry_axis=args.axis)
+    kwargs = dict(population_size=args.population, seed=args.seed, profile=profile,
+                  log_path=args.log, verbose=not args.quiet)
+    if args.multires:
+        from multires import run_multires
+        best = run_multires(block=args.multires, time_budget=args.time_budget, fine_population=args.population,
+                            coarse_generations=None if args.time_budget else 60,
+                            fine_generations=args.generations or (None if args.time_budget else 10),
+                            seed=args.seed, profile=profile, log_path=args.log, verbose=not args.quiet)
+    elif args.regions:
+        from regions import run_regions
+        best = run_regions(profile=profile, time_budget=args.time_budget, population_size=args.population,
+                           generations=args.generations or (None if args.time_budget else 30),
+                           workers=args.workers, seed=args.seed, verbose=not args.quiet)
+    elif args.steady_state:
+        evaluations = args.generations * args.population if args.generations else None
+        if not (args.time_budget or evaluations):
+            sys.exit("--steady-state needs --time-budget or --generations")
+        best = ga.run_steady_state(workers=args.workers, time_budget=args.time_budget,
+                                   max_evaluations=evaluations, **kwargs)
+    else:
+        if args.surrogate:
+            from surrogate import Surrogate
+            kwargs["surrogate"] = Surrogate()
+        kwargs["prune_quantile"] = args.prune_quantile
+        if args.time_budget:
+            best = ga.generate(time_budget=args.time_budget, generations=args.generations,
+                               duplicates=args.duplicates, **kwargs)
+        else:
+            best = ga.run_ga(generations=args.generations or 80, duplicates=args.duplicates, **kwargs)
+    ga.save_map_txt_strgrid(best.map, args.out)
+    print(f"Final fitness: {best.fitness} ({best.stop_reason})")
+    print("Saved TXT to", args.out)
+
+
+def cmd_elites(args):
+    from map_elites import run_map_elites
+    from map_sliders import GenerationProfile, DEFAULT_PROFILE
+
+    profile = GenerationProfile.from_file(args.profile) if args.profile else DEFAULT_PROFILE
+    archive = run_map_elites(iterations=args.iterations, initial=args.initial, seed=args.seed,
+                             time_budget=args.time_budget, profile=profile, verbose=not args.quiet)
+    archive.save_dir(args.out_dir)
+    print(f"Saved {len(archive)} elites to {args.out_dir} (coverage {archive.coverage():.1%})")
+
+
+def cmd_pareto(args):
+    from nsga2 import run_nsga2, save_front, OBJECTIVES
+    from map_sliders import GenerationProfile, DEFAULT_PROFILE
+
+    objectives = tuple(args.objectives.split(",")) if args.objectives else OBJECTIVES
+    unknown = set(objectives) - set(OBJECTIVES)
+    if unknown:
+        sys.exit(f"unknown objectives {sorted(unknown)}, expected some of {', '.join(OBJECTIVES)}")
+    profile = GenerationProfile.from_file(args.profile) if args.profile else DEFAULT_PROFILE
+    front = run_nsga2(population_size=args.population, generations=args.generations, seed=args.seed,
+                      objectives=objectives, time_budget=args.time_budget, profile=profile,
+                      verbose=not args.quiet)
+    save_front(front, args.out_dir, objectives)
+    print(f"Saved {len(front)} Pareto-optimal maps to {args.out_dir}")
+
+
+def cmd_evaluate(args):
+    import json
+    import ga
+    from fitness import evaluate_map_fitness
+
+    for path in args.maps:
+        score, parts = evaluate_map_fitness(ga.load_map_txt_strgrid(path), breakdown=True)
+        print(json.dumps({"path": path, **parts}) if args.json else f"{path}: {score}")
+
+
+def cmd_export(args):
+    import json
+    import ga
+    from map.tiles import LEGEND, names_to_ids
+
+    grid = ga.load_map_txt_strgrid(args.map)
+    if args.format == "json":
+        data = {"h": len(grid), "w": len(grid[0]), "grid": names_to_ids(grid), "legend": LEGEND}
+        with open(args.out, "w") as f:
+            json.dump(data, f)
+    else:
+        ga.save_map_txt_strgrid(grid, args.out)
+    print("Saved", args.format.upper(), "to", args.out)
+
+
+ASCII = {"empty": " .", "wall": " #", "bush": " ~", "spawn": " S", "cover": " +", "water": " w", "box": " b"}
+
+
+def cmd_view(args):
+    import ga
+
+    grid = ga.load_map_txt_strgrid(args.map)
+    if args.ascii:
+        print("\n".join("".join(ASCII.get(cell, " ?") for cell in row) for row in grid))
+        return
+    import matplotlib
+    if args.save:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    plt.imshow([[ga.ID_MAP[cell] for cell in row] for row in grid], interpolation="nearest")
+    plt.title(args.map)
+    plt.axis("off")
+    if args.save:
+        plt.savefig(args.save, bbox_inches="tight")
+        print("Saved PNG to", args.save)
+    else:
+        plt.show()
+
+
+def cmd_render(args):
+    from map.visualize import render_files, render_contact_sheet
+
+    if args.out_dir:
+        written = render_files(args.maps, args.out_dir, workers=args.workers, tile_px=args.tile_px,
+                               symmetry_axis=args.axis)
+        print(f"Rendered {len(written)} previews to {args.out_dir}")
+    if args.sheet:
+        render_contact_sheet(args.maps, args.sheet, columns=args.columns, symmetry_axis=args.axis)
+        print("Saved contact sheet to", args.sheet)
+
+
+def quantile(text):
+    """argparse type: a float strictly between 0 and 1."""
+    value = float(text)
+    if not 0 < value < 1:
+        raise argparse.ArgumentTypeError(f"{text} is not in (0, 1)")
+    return value
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="Brawl Stars map generator tools.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("generate", help="evolve a map and save it as Unity TXT")
+    p.add_argument("--out", default="best_map.txt")
+    p.add_argument("--time-budget", type=float, help="seconds; anytime mode, returns the best map so far")
+    p.add_argument("--generations", type=int)
+    p.add_argument("--population", type=int, default=60)
+    p.add_argument("--seed", type=int)
+    p.add_argument("--profile", help="GenerationProfile JSON file")
+    p.add_argument("--size", type=int)
+    p.add_argument("--axis", choices=symmetry.AXES)
+    p.add_argument("--duplicates", choices=("keep", "random", "mutate"), default="keep",
+                   help="what to do with children identical to one already in the population")
+    p.add_argument("--steady-state", action="store_true",
+                   help="no generation barrier: a worker pool breeds children that replace the worst map")
+    p.add_argument("--regions", action="store_true",
+                   help="large maps: evolve ~60x60 regions of the half map in parallel, then stitch them")
+    p.add_argument("--workers", type=int, help="--steady-state / --regions pool size (default: CPU count)")
+    p.add_argument("--multires", type=int, metavar="BLOCK",
+                   help="evolve a layout of BLOCK x BLOCK tile blocks first, then refine the full map")
+    p.add_argument("--surrogate", action="store_true",
+                   help="skip evaluating children an online model predicts to be clearly poor")
+    p.add_argument("--prune-quantile", type=quantile,
+                   help="skip expensive terms for children whose upper bound cannot reach this "
+                        "quantile of the previous generation (0.1 = the elite)")
+    p.add_argument("--log", help="write per-generation JSON lines here")
+    p.add_argument("--quiet", action="store_true")
+    p.set_defaults(func=cmd_generate)
+
+    p = sub.add_parser("elites", help="MAP-Elites: save the best map of every descriptor cell")
+    p.add_argument("--out-dir", default="elites")
+    p.add_argument("--iterations", type=int, default=1000)
+    p.add_argument("--initial", type=int, default=50, help="random maps to seed the archive")
+    p.add_argument("--time-budget", type=float, help="seconds")
+    p.add_argument("--seed", type=int)
+    p.add_argument("--profile", help="GenerationProfile JSON file")
+    p.add_argument("--quiet", action="store_true")
+    p.set_defaults(func=cmd_elites)
+
+    p = sub.add_parser("pareto", help="NSGA-II: every soft term is an objective; save the Pareto front")
+    p.add_argument("--out-dir", default="pareto")
+    p.add_argument("--population", type=int, default=100)
+    p.add_argument("--generations", type=int, default=50)
+    p.add_argument("--objectives", help="comma-separated soft term names (default: all)")
+    p.add_argument("--time-budget", type=float, help="seconds")
+    p.add_argument("--seed", type=int)
+    p.add_argument("--profile", help="GenerationProfile JSON file")
+    p.add_argument("--quiet", action="store_true")
+    p.set_defaults(func=cmd_pareto)
+
+    p = sub.add_parser("evaluate", help="score TXT maps")
+    p.add_argument("maps", nargs="+")
+    p.add_argument("--json", action="store_true", help="print the full breakdown as JSON lines")
+    p.set_defaults(func=cmd_evaluate)
+
+    p = sub.add_parser("export", help="convert a TXT map")
+    p.add_argument("map")
+    p.add_argument("--format", choices=("json", "txt"), default="json")
+    p.add_argument("--out", required=True)
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("view", help="show a TXT map")
+    p.add_argument("map")
+    p.add_argument("--ascii", action="store_true", help="print to the terminal instead of opening a window")
+    p.add_argument("--save", help="write a PNG instead of opening a window")
+    p.set_defaults(func=cmd_view)
+
+    p = sub.add_parser("render", help="headless sprite previews / contact sheet for many TXT maps")
+    p.add_argument("maps", nargs="+")
+    p.add_argument("--out-dir", help="write one <name>.png per map here")
+    p.add_argument("--sheet", help="write a contact sheet of all maps here")
+    p.add_argument("--columns", type=int, default=8)
+    p.add_argument("--tile-px", type=int, default=16)
+    p.add_argument("--workers", type=int)
+    p.add_argument("--axis", choices=symmetry.AXES, default="vertical", help="decides which spawns are team B")
+    p.set_defaults(func=cmd_render)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+Multi-source BFS distance fields for gameplay fitness terms.
+
+Grids are flattened to one list in row-major order (index = y * cols + x)
+and a field is a list of walking distances with UNREACHED (-1) for tiles
+no source can reach. One BFS per source class answers every "distance to
+the nearest X" query at once, instead of one search per pair of tiles.
+
+    mask = passable_mask(grid, TRAVERSABLE)
+    dist, owner = nearest_source(mask, cols, spawn_indices)
+    gaps = source_gaps(dist, owner, cols)    # walking distance between neighbouring sources
+"""
+from itertools import chain
+
+UNREACHED = -1
+
+
+def passable_mask(grid, passable):
+    """Flat list of bools, True where the tile type is in passable."""
+    return [tile in passable for tile in chain.from_iterable(grid)]
+
+
+def flat_positions(grid, tile_type):
+    """Flat indices of every tile_type tile."""
+    return [i for i, tile in enumerate(chain.from_iterable(grid)) if tile == tile_type]
+
+
+def distance_field(mask, cols, sources):
+    """Distance from every tile to the nearest source, walking 4-connected over mask."""
+    return nearest_source(mask, cols, sources)[0]
+
+
+def nearest_source(mask, cols, sources):
+    """
+    (dist, owner): dist as in distance_field, owner[i] is the position in
+    sources of the source that reached tile i first (-1 if none). Sources
+    are seeded even when they are not passable themselves.
+    """
+    n = len(mask)
+    dist = [UNREACHED] * n
+    owner = [UNREACHED] * n
+    frontier = []
+    for k, i in enumerate(sources):
+        if dist[i] == UNREACHED:
+            dist[i] = 0
+            owner[i] = k
+            frontier.append(i)
+    last = cols - 1
+    d = 0
+    # level by level, so every tile of one frontier shares the same distance
+    while frontier:
+        d += 1
+        nxt = []
+        for i in frontier:
+            k = owner[i]
+            x = i % cols
+            for j in (i - cols, i + cols, i - 1 if x else -1, i + 1 if x != last else -1):
+                if 0 <= j < n and mask[j] and dist[j] == UNREACHED:
+                    dist[j] = d
+                    owner[j] = k
+                    nxt.append(j)
+        frontier = nxt
+    return dist, owner
+
+
+def source_gaps(dist, owner, cols):
+    """
+    {(a, b): walking distance} for every pair of sources a < b whose
+    regions in nearest_source touch. The shortest path between two
+    neighbouring sources crosses their shared border, so the minimum of
+    dist[u] + 1 + dist[v] over border edges (u, v) is their distance;
+    pairs with a third source in between are not reported.
+    """
+    gaps = {}
+    n = len(dist)
+    for i in range(n):
+        a = owner[i]
+        if a == UNREACHED:
+            continue
+        right = i + 1 if (i + 1) % cols else n
+        for j in (right, i + cols):
+            if j < n:
+                b = owner[j]
+                if b != UNREACHED and b != a:
+                    key = (a, b) if a < b else (b, a)
+                    d = dist[i] + 1 + dist[j]
+                    if d < gaps.get(key, d + 1):
+                        gaps[key] = d
+    return gaps
@@ -1,94 +1,183 @@
-from collections import deque
+from collections import Counter
+from itertools import chain
 import math
+import time
 
-# Tile Constants
-WALKABLE = "empty"
-WALL = "wall"
-WATER = "water"
-COVER = "cover"
-BOX = "box"
-SPAWN = "spawn"
-BUSH = "bush"
+import balance
+import distance
+import kernels
+import profiling
+import symmetry
+import visibility
+from map.tiles import Tile, TILE_NAMES
+
+# Tile Constants (names from the shared legend in map/tiles.py)
+WALKABLE = TILE_NAMES[Tile.EMPTY]
+WALL = TILE_NAMES[Tile.WALL]
+WATER = TILE_NAMES[Tile.WATER]
+COVER = TILE_NAMES[Tile.COVER]
+BOX = TILE_NAMES[Tile.BOX]
+SPAWN = TILE_NAMES[Tile.SPAWN]
+BUSH = TILE_NAMES[Tile.BUSH]
 
 TRAVERSABLE = {WALKABLE, BOX, SPAWN, BUSH}
+PASSABLE = {WALKABLE, BUSH, SPAWN}      # walkable without breaking anything
+
+# Hard constraint limits; box limits are for a 60x60 map and scale with area
+MIN_MAP_SIZE = 30
+MAX_MAP_SIZE = 512
+BASE_AREA = 60 * 60
+SPAWN_COUNT = 10
+MIN_BOX_COUNT = 20
+MAX_BOX_COUNT = 35
+
+# Gameplay distance rules, in walking tiles on a 60x60 map (scaled with map width)
+MAX_SPAWN_BOX_DIST = 20     # every spawn should have a box this close
+CLOSE_SPAWN_DIST = 18       # spawns closer than this (Manhattan) need a barrier...
+BARRIER_DETOUR = 4          # ...that makes the walk at least this much longer
+BOX_SPAWN_TARGET = 10       # mean box-to-nearest-spawn distance that earns full marks
+# Full marks of one gameplay or line-of-sight term on a 60x60 map, scaled
+# with area. About one standard deviation of wall_cluster_score over 60x60
+# maps, so these terms move the ranking instead of vanishing in its noise.
+# All of them are rewards (0 to full marks): a feasible map must never fall
+# below the 0 of an infeasible one.
+GAMEPLAY_WEIGHT = 60000
+SIGHT_RADIUS = 10           # roughly a long-range brawler's attack range
+
+SIGHT_BLOCKING = {WALL, COVER, BOX}
+SIGHT_CONCEALING = {BUSH}
 
 # Main Fitness Function
-def evaluate_map_fitness(game_map):
+def evaluate_map_fitness(game_map, breakdown=False, cutoff=None, hard_constraints=None, soft_terms=None):
     """
     Evaluate the fitness of a Brawl Stars map.
     Returns 0 if any hard constraint fails.
+    With breakdown=True returns (score, parts) where parts maps every hard
+    constraint to a bool, every soft term that ran to its score, plus
+    "total" and "eval_time" (seconds).
+
+    cutoff turns on staged evaluation: terms without an entry in
+    TERM_BOUNDS run first, then the bounded (expensive) ones, largest bound
+    first. As soon as the score so far plus the bounds of the terms still
+    to run drops below cutoff, the map cannot reach cutoff; the rest is
+    skipped and that upper bound is returned instead of the exact score
+    (parts["pruned"] says which happened).
+
+    hard_constraints and soft_terms replace HARD_CONSTRAINTS and
+    SOFT_TERMS, e.g. to score a block layout that is smaller than any real
+    arena, or one region of a map on the terms that make sense locally.
     """
-    # Hard Constraints
-    if not valid_size(game_map):
-        return 0
-    if not valid_player_count(game_map):
-        return 0
-    if not valid_box_count(game_map):
-        return 0
+    eval_start = time.perf_counter()
+    timed = breakdown or profiling.active() is not None
+    parts = {} if breakdown else None
+    profiling.count("evaluations")
+
+    # Hard Constraints (one histogram pass shared by all checks)
+    counts = tile_counts(game_map)
+    ok = True
+    for name, check in HARD_CONSTRAINTS if hard_constraints is None else hard_constraints:
+        passed = check(game_map, counts)
+        ok = ok and passed
+        if parts is not None:
+            parts[name] = passed
+        elif not ok:
+            break
+    profiling.add_term_time("hard_constraints", time.perf_counter() - eval_start)
 
-    #soft scoring
     score = 0
-    score += symmetry_score(game_map)
-    score += reachable_tiles_score(game_map)
-    score += central_area_score(game_map)
-    score += wall_cluster_score(game_map)
+    terms = SOFT_TERMS if soft_terms is None else soft_terms
+    pending_bound = 0
+    if cutoff is not None:
+        names = {name for name, _ in terms}
+        bounds = {name: bound(game_map, counts) for name, bound in TERM_BOUNDS.items() if name in names}
+        terms = ([t for t in terms if t[0] not in bounds]
+                 + sorted((t for t in terms if t[0] in bounds), key=lambda t: -bounds[t[0]]))
+        pending_bound = sum(bounds.values())
+        if parts is not None:
+            parts["pruned"] = False
+    if not ok:
+        profiling.count("hard_constraint_failures")
+    else:
+        #soft scoring
+        for name, term in terms:
+            if cutoff is not None and name in bounds:
+                if score + pending_bound < cutoff:
+                    profiling.count("pruned_evaluations")
+                    score += pending_bound
+                    if parts is not None:
+                        parts["pruned"] = True
+                    break
+                pending_bound -= bounds[name]
+            if timed:
+                start = time.perf_counter()
+                value = term(game_map)
+                profiling.add_term_time(name, time.perf_counter() - start)
+            else:
+                value = term(game_map)
+            if parts is not None:
+                parts[name] = value
+            score += value
 
-    return score
+    if parts is None:
+        return score
+    parts["total"] = score
+    parts["eval_time"] = time.perf_counter() - eval_start
+    return score, parts
 
 # Hard Constraint Checks
-def valid_size(game_map):
+# counts is an optional tile_counts() histogram so callers can share one pass
+def valid_size(game_map, counts=None):
     rows, cols = len(game_map), len(game_map[0])
-    return (rows, cols) in [(60, 60), (64, 64)]
+    return all(MIN_MAP_SIZE <= n <= MAX_MAP_SIZE and n % 2 == 0 for n in (rows, cols))
 
-def valid_player_count(game_map):
-    return count_tiles(game_map, SPAWN) == 10
+def box_count_range(rows, cols):
+    scale = rows * cols / BASE_AREA
+    return round(MIN_BOX_COUNT * scale), round(MAX_BOX_COUNT * scale)
 
-def valid_box_count(game_map):
-    box_count = count_tiles(game_map, BOX)
-    return 20 <= box_count <= 35
+def valid_player_count(game_map, counts=None):
+    if counts is None:
+        return count_tiles(game_map, SPAWN) == SPAWN_COUNT
+    return counts[SPAWN] == SPAWN_COUNT
 
-# Soft Constraint Functions
+def valid_box_count(game_map, counts=None):
+    box_count = count_tiles(game_map, BOX) if counts is None else counts[BOX]
+    low, high = box_count_range(len(game_map), len(game_map[0]))
+    return low <= box_count <= high
 
-def symmetry_score(game_map):
+def passes_hard_constraints(game_map, counts=None, constraints=None):
     """
-    Returns a score based on how many tiles are mirrored left-to-right.
-    One point for each matching pair.
+    Cheap pre-filter: True iff evaluate_map_fitness would score the map
+    above 0. One pass over the grid, no soft terms.
     """
-    rows, cols = len(game_map), len(game_map[0])
-    score = 0
-    for r in range(rows):
-        for c in range(cols // 2):
-            left_tile = game_map[r][c]
-            right_tile = game_map[r][cols - c - 1]
-            if left_tile == right_tile:
-                score += 5 #score
-    return score
+    if counts is None:
+        counts = tile_counts(game_map)
+    for _, check in HARD_CONSTRAINTS if constraints is None else constraints:
+        if not check(game_map, counts):
+            return False
+    return True
 
-def reachable_tiles_score(game_map):
-    rows, cols = len(game_map), len(game_map[0])
+# Soft Constraint Functions
 
-    traversable_positions = [
-        (r, c) for r in range(rows) for c in range(cols)
-        if game_map[r][c] in TRAVERSABLE
-    ]
+def symmetry_score(game_map, axis=None):
+    """
+    Returns a score based on how many tiles match their mirror partner.
+    Five points for each matching pair. axis is any symmetry.AXES mode;
+    None scores whichever mode the map is closest to, so vertical,
+    horizontal and rotational maps are all judged on their own symmetry.
+    """
+    if axis is None:
+        _, pairs = symmetry.best_axis(game_map)
+    else:
+        pairs = symmetry.matching_pairs(game_map, axis)
+    return pairs * 5 #score
 
-    if not traversable_positions:
+def reachable_tiles_score(game_map):
+    """Number of traversable tiles connected to the first one in scan order."""
+    mask = kernels.mask_of(game_map, TRAVERSABLE)
+    start = mask.find(1)
+    if start == -1:
         return 0
-
-    start = traversable_positions[0]
-    visited = set([start])
-    queue = deque([start])
-
-    while queue:
-        r, c = queue.popleft()
-        for dr, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-            nr, nc = r + dr, c + dc
-            if 0 <= nr < rows and 0 <= nc < cols:
-                if (nr, nc) not in visited and game_map[nr][nc] in TRAVERSABLE:
-                    visited.add((nr, nc))
-                    queue.append((nr, nc))
-
-    return len(visited)
+    return kernels.count_reachable(mask, len(game_map[0]), start)
 
 def central_area_score(game_map):
     """
@@ -123,38 +212,245 @@ def central_area_score(game_map):
 def wall_cluster_score(game_map):
     """
     Reward WALL tiles for forming contiguous clusters.
-    Each cluster contributes cluster_size^1.5 points.
+    Each cluster contributes cluster_size^2.7 points.
     Tiles are only counted once per cluster.
     """
-    rows, cols = len(game_map), len(game_map[0])
-    visited = set()
-    total_score = 0
-
-    for r in range(rows):
-        for c in range(cols):
-            if game_map[r][c] == WALL and (r, c) not in visited:
-                # Explore this cluster
-                cluster_size = 0
-                stack = [(r, c)]
-                visited.add((r, c))
-
-                while stack:
-                    cr, cc = stack.pop()
-                    cluster_size += 1
-                    # Check orthogonal neighbors
-                    for dr, dc in [(-1,0),(1,0),(0,-1),(0,1)]:
-                        nr, nc = cr+dr, cc+dc
-                        if 0 <= nr < rows and 0 <= nc < cols:
-                            if game_map[nr][nc] == WALL and (nr, nc) not in visited:
-                                visited.add((nr, nc))
-                                stack.append((nr, nc))
-
-                # Reward cluster based on size
-                total_score += cluster_size ** 2.7
-
-    return total_score
+    sizes = kernels.component_sizes(kernels.mask_of(game_map, (WALL,)), len(game_map[0]))
+    return sum(size ** 2.7 for size in sizes)
+
+# Gameplay terms; the distances all come from the shared DistanceFields.
+# Together with the line-of-sight and balance terms they add ~11 ms to a
+# 60x60 evaluation (~60 ms at 120x120); the other terms take ~1.4 ms (~5 ms).
+def _length_scale(game_map):
+    return math.sqrt(len(game_map) * len(game_map[0]) / BASE_AREA)
+
+def gameplay_max(game_map):
+    """Full marks of one gameplay term for this map size."""
+    return GAMEPLAY_WEIGHT * len(game_map) * len(game_map[0]) / BASE_AREA
+
+def player_box_distance_score(game_map):
+    """
+    Reward spawns with a box at most MAX_SPAWN_BOX_DIST walking tiles away:
+    the share of spawns that have one.
+    """
+    fields = distance_fields(game_map)
+    if not fields.spawns:
+        return 0
+    limit = MAX_SPAWN_BOX_DIST * _length_scale(game_map)
+    from_boxes = fields.from_boxes
+    near = sum(1 for i in fields.spawns if 0 <= from_boxes[i] <= limit)
+    return gameplay_max(game_map) * near / len(fields.spawns)
+
+def close_spawns_barrier_score(game_map):
+    """
+    Reward barriers between neighbouring spawns closer than CLOSE_SPAWN_DIST
+    (Manhattan): the share of those pairs whose walk is at least
+    BARRIER_DETOUR tiles longer than the straight line.
+    """
+    fields = distance_fields(game_map)
+    cols = fields.cols
+    spawns = fields.spawns
+    limit = CLOSE_SPAWN_DIST * _length_scale(game_map)
+    close = open_pairs = 0
+    for (a, b), walk in fields.spawn_gaps.items():
+        (ay, ax), (by, bx) = divmod(spawns[a], cols), divmod(spawns[b], cols)
+        manhattan = abs(ay - by) + abs(ax - bx)
+        if manhattan < limit:
+            close += 1
+            open_pairs += walk < manhattan + BARRIER_DETOUR
+    return gameplay_max(game_map) * (1 - open_pairs / close if close else 1)
+
+def box_distribution_score(game_map):
+    """
+    Reward boxes spread away from the spawns: mean walking distance from
+    each reachable box to its nearest spawn, full marks at BOX_SPAWN_TARGET.
+    """
+    fields = distance_fields(game_map)
+    from_spawns = fields.from_spawns
+    dists = [from_spawns[i] for i in fields.boxes if from_spawns[i] >= 0]
+    if not dists:
+        return 0
+    mean = sum(dists) / len(dists)
+    return gameplay_max(game_map) * min(mean / (BOX_SPAWN_TARGET * _length_scale(game_map)), 1)
+
+def spawn_center_score(game_map):
+    """
+    Reward spawns that are equally far from the centre: min / max of their
+    walking distances to the central tiles. 0 if a spawn cannot reach it.
+    """
+    fields = distance_fields(game_map)
+    from_center = fields.from_center
+    dists = [from_center[i] for i in fields.spawns]
+    if not dists or min(dists) <= 0:
+        return 0
+    return gameplay_max(game_map) * min(dists) / max(dists)
+
+# Line-of-sight terms; visible sets come from the shared Visibility
+def spawn_exposure_score(game_map):
+    """
+    Reward sheltered spawns: 1 - mean share of the tiles within SIGHT_RADIUS
+    that each spawn can see (and so be shot from). Walls, cover and boxes
+    block sight; bushes hide whoever stands in them.
+    """
+    vis = visibility_fields(game_map)
+    spawns = distance.flat_positions(game_map, SPAWN)
+    if not spawns:
+        return 0
+    exposure = sum(len(vis.visible(i)) for i in spawns) / (len(spawns) * vis.disc_size)
+    return gameplay_max(game_map) * (1 - exposure)
+
+def center_sightline_score(game_map):
+    """
+    Reward a centre broken up by walls, cover and bushes: the share of
+    tiles within SIGHT_RADIUS of the centre that it cannot see.
+    """
+    vis = visibility_fields(game_map)
+    center = (vis.rows // 2) * vis.cols + vis.cols // 2
+    return gameplay_max(game_map) * max(0, 1 - len(vis.visible(center)) / vis.disc_size)
+
+# Team balance
+def team_balance_score(game_map):
+    """
+    Reward maps where no spawn reaches more of the boxes, bushes or central
+    tiles first than the others: 1 - mean imbalance over the three
+    categories. Per spawn, not per team: mirrored teams always tie.
+    """
+    result = _grid_analysis(game_map, "balance", _team_balance)
+    return gameplay_max(game_map) * (1 - result.mean_imbalance())
+
+def balance_job(game_map):
+    """Arguments of balance.team_balance for game_map, as used by team_balance_score."""
+    fields = distance_fields(game_map)
+    targets = {"boxes": fields.boxes, "bushes": distance.flat_positions(game_map, BUSH),
+               "center": fields.center}
+    return (game_map, [[i] for i in fields.spawns], PASSABLE, targets)
+
+def _team_balance(game_map):
+    return balance.team_balance(*balance_job(game_map))
+
+# (name, function) pairs checked/summed by evaluate_map_fitness
+HARD_CONSTRAINTS = [
+    ("valid_size", valid_size),
+    ("valid_player_count", valid_player_count),
+    ("valid_box_count", valid_box_count),
+]
+
+SOFT_TERMS = [
+    ("symmetry_score", symmetry_score),
+    ("reachable_tiles_score", reachable_tiles_score),
+    ("central_area_score", central_area_score),
+    ("wall_cluster_score", wall_cluster_score),
+    ("player_box_distance_score", player_box_distance_score),
+    ("close_spawns_barrier_score", close_spawns_barrier_score),
+    ("box_distribution_score", box_distribution_score),
+    ("spawn_center_score", spawn_center_score),
+    ("spawn_exposure_score", spawn_exposure_score),
+    ("center_sightline_score", center_sightline_score),
+    ("team_balance_score", team_balance_score),
+]
+
+# Upper bounds of the expensive soft terms from the tile histogram alone,
+# for staged evaluation; terms not listed are cheap and always run first.
+# A sum of cluster_size ** 2.7 is at most (total walls) ** 2.7.
+TERM_BOUNDS = {
+    "reachable_tiles_score": lambda game_map, counts: sum(counts[t] for t in TRAVERSABLE),
+    "wall_cluster_score": lambda game_map, counts: counts[WALL] ** 2.7,
+    "player_box_distance_score": lambda game_map, counts: gameplay_max(game_map) if counts[SPAWN] else 0,
+    "close_spawns_barrier_score": lambda game_map, counts: gameplay_max(game_map),
+    "box_distribution_score": lambda game_map, counts: gameplay_max(game_map) if counts[BOX] else 0,
+    "spawn_center_score": lambda game_map, counts: gameplay_max(game_map),
+    "spawn_exposure_score": lambda game_map, counts: gameplay_max(game_map) if counts[SPAWN] else 0,
+    "center_sightline_score": lambda game_map, counts: gameplay_max(game_map),
+    "team_balance_score": lambda game_map, counts: gameplay_max(game_map),
+}
 
 # Utility Functions
+def tile_counts(game_map):
+    """Histogram of every tile type in a single pass."""
+    return Counter(chain.from_iterable(game_map))
+
+def grid_key(game_map):
+    """Hashable snapshot of the grid contents."""
+    return tuple(map(tuple, game_map))
+
+class DistanceFields:
+    """
+    Multi-source BFS fields over TRAVERSABLE tiles, each computed on first
+    use: one BFS from all spawns (with the nearest-spawn owner of every
+    tile), one from all boxes and one from the central tiles.
+    """
+    CENTER_RADIUS = 2
+
+    def __init__(self, game_map):
+        self.rows, self.cols = len(game_map), len(game_map[0])
+        self.mask = distance.passable_mask(game_map, TRAVERSABLE)
+        self.spawns = distance.flat_positions(game_map, SPAWN)
+        self.boxes = distance.flat_positions(game_map, BOX)
+        self._from_spawns = self._spawn_owner = self._from_boxes = self._from_center = None
+        self._spawn_gaps = None
+
+    def _spawn_field(self):
+        if self._from_spawns is None:
+            self._from_spawns, self._spawn_owner = distance.nearest_source(self.mask, self.cols, self.spawns)
+        return self._from_spawns, self._spawn_owner
+
+    @property
+    def from_spawns(self):
+        return self._spawn_field()[0]
+
+    @property
+    def spawn_gaps(self):
+        """{(a, b): walking distance} for neighbouring spawns, a and b index self.spawns."""
+        if self._spawn_gaps is None:
+            self._spawn_gaps = distance.source_gaps(*self._spawn_field(), self.cols)
+        return self._spawn_gaps
+
+    @property
+    def from_boxes(self):
+        if self._from_boxes is None:
+            self._from_boxes = distance.distance_field(self.mask, self.cols, self.boxes)
+        return self._from_boxes
+
+    @property
+    def center(self):
+        """Flat indices of the 2*CENTER_RADIUS square in the middle of the map."""
+        r = self.CENTER_RADIUS
+        cy, cx = self.rows // 2, self.cols // 2
+        return [y * self.cols + x for y in range(cy - r, cy + r) for x in range(cx - r, cx + r)]
+
+    @property
+    def from_center(self):
+        if self._from_center is None:
+            center = [i for i in self.center if self.mask[i]]
+            self._from_center = distance.distance_field(self.mask, self.cols, center)
+        return self._from_center
+
+# one-slot cache of per-grid analyses, keyed on the grid contents so
+# in-place edits are safe; every term of one evaluation shares the entry
+_analysis_key = None
+_analysis = {}
+
+def _grid_analysis(game_map, kind, build):
+    global _analysis_key
+    key = grid_key(game_map)
+    if key != _analysis_key:
+        _analysis_key = key
+        _analysis.clear()
+    result = _analysis.get(kind)
+    if result is None:
+        result = _analysis[kind] = build(game_map)
+    return result
+
+def distance_fields(game_map):
+    """DistanceFields for game_map, shared by every gameplay term of one evaluation."""
+    return _grid_analysis(game_map, "distance", DistanceFields)
+
+def visibility_fields(game_map):
+    """visibility.Visibility for game_map; per-origin visible sets are computed once per grid."""
+    radius = round(SIGHT_RADIUS * _length_scale(game_map))
+    return _grid_analysis(game_map, "visibility", lambda g: visibility.Visibility(
+        g, SIGHT_BLOCKING, SIGHT_CONCEALING, radius))
+
 def count_tiles(game_map, tile_type):
     return sum(row.count(tile_type) for row in game_map)
 
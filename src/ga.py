@@ -1,60 +1,80 @@
 import copy
+import os
 import random
+import time
 from fitness import (
-    evaluate_map_fitness, WALKABLE, WALL, WATER, COVER, BOX, SPAWN, BUSH, get_positions
+    evaluate_map_fitness, passes_hard_constraints, tile_counts, WALKABLE, WALL, WATER, COVER, BOX, SPAWN, BUSH,
+    get_positions, box_count_range, SPAWN_COUNT, PASSABLE, grid_key, HARD_CONSTRAINTS, SOFT_TERMS
 )
 
-import collections
-import map_sliders
+import bitboards
+import kernels
+import profiling
+import symmetry
+from map_sliders import DEFAULT_PROFILE
+from map.tiles import NAME_TO_ID, ID_TO_NAME
 
 #Michael, Ann, Matthew, Kiana
-PASSABLE = {WALKABLE, BUSH, SPAWN}
 OBSTACLE = {WALL, WATER, COVER, BOX}
 
-DEFAULT_CLEARANCE = map_sliders.DEFAULT_CLEARANCE
-CORRIDOR_WIDTH = map_sliders.CORRIDOR_WIDTH
-MAP_SIZE = map_sliders.MAP_SIZE
-MIN_SPAWN_DIST = MAP_SIZE/5
 
 
 
 class BrawlStarsMap:
-    def __init__(self, size=(MAP_SIZE, MAP_SIZE), symmetry_axis="vertical", clearance=DEFAULT_CLEARANCE):
+    hard_constraints = HARD_CONSTRAINTS                     # what feasibility and fitness check
+    soft_terms = SOFT_TERMS                                 # what run_ga scores
+
+    def __init__(self, size=None, symmetry_axis=None, clearance=None, profile=None):
+        # explicit arguments win over the profile's values
+        self.profile = profile or DEFAULT_PROFILE
+        size = size or (self.profile.map_size, self.profile.map_size)
+        symmetry_axis = symmetry_axis or self.profile.symmetry_axis
+        symmetry.check_axis(symmetry_axis)
+        clearance = self.profile.clearance if clearance is None else clearance
         self.rows, self.cols = size
         self.map = [[WALKABLE for _ in range(self.cols)] for _ in range(self.rows)]
         self.fitness = None
-        self.symmetry_axis = symmetry_axis 
+        self.breakdown = None                               # per-term scores from evaluate_map_fitness
+        self.stop_reason = None                             # set on the map run_ga returns
+        self.features = None                                # surrogate features, set when screened
+        self.symmetry_axis = symmetry_axis                  # one of symmetry.AXES
         self.clearance = clearance                          # how much empty space around an element
 
     @classmethod
-    def random_map(cls, rng, max_tries=20):
+    def random_map(cls, rng, max_tries=20, **map_kwargs):
         for _ in range(max_tries):
-            m = cls()
+            m = cls(**map_kwargs)
             for x, y in m._generate_spawn_points(rng):          #create spawn points
                 m.map[y][x] = SPAWN
 
             m._place_structures_half(rng)                          # build half a map
             m._apply_symmetry()                                    # apply symmetry
 
-            m._ensure_spawn_connectivity()                          # Connectivity repair (carves minimal corridors if needed)
-
-            if evaluate_map_fitness(m.map) > 0:
-                return m
+            # repair only ever removes boxes, so too few spawns/boxes now means a reject
+            counts = tile_counts(m.map)
+            if counts[SPAWN] == SPAWN_COUNT and counts[BOX] >= box_count_range(m.rows, m.cols)[0]:
+                m._ensure_spawn_connectivity()                      # Connectivity repair (carves minimal corridors if needed)
+                m._repair_boxes()
+                if passes_hard_constraints(m.map, constraints=m.hard_constraints):
+                    return m
+            else:
+                profiling.count("prefilter_rejects")
+            profiling.count("random_map_retries")
         return m
 
     def _generate_spawn_points(self, rng):                                              # Spawn placement (y, x)
-        spawns = [(5,5), (self.cols-6,5), (5,self.rows-6), (self.cols-6,self.rows-6)]   # Four corners-ish + 6 random (mirrored-friendly by pairing)
+        m = max(3, min(self.rows, self.cols) // 12)                                     # corner inset, 5 on a 60x60 map
+        spawns = [(m,m), (self.cols-1-m,m), (m,self.rows-1-m), (self.cols-1-m,self.rows-1-m)]   # Four corners-ish + 6 random (mirrored-friendly by pairing)
         cx, cy = self.cols // 2, self.rows // 2
         attempts = 0
         while len(spawns) < 10 and attempts < 500:
-            if self.symmetry_axis == "vertical":                                        # sample on left/top half then mirror its pair to enforce symmetry
+            if symmetry.splits_columns(self.symmetry_axis):                             # sample on left/top half then mirror its pair to enforce symmetry
                 x = rng.randint(2, cx-2)
                 y = rng.randint(2, self.rows-3)
-                pair = (self.cols-1-x, y)
             else:
                 x = rng.randint(2, self.cols-3)
                 y = rng.randint(2, cy-2)
-                pair = (x, self.rows-1-y)
+            pair = symmetry.mirror(x, y, self.rows, self.cols, self.symmetry_axis)
             cand = (x, y)
             if self._valid_spawn_position(cand, spawns) and self._valid_spawn_position(pair, spawns):
                 spawns.append((x, y))
@@ -68,54 +88,59 @@ class BrawlStarsMap:
         if x < 0 or x >= self.cols or y < 0 or y >= self.rows:
             return False
         for ex, ey in existing:
-            if abs(ex - x) + abs(ey - y) < MIN_SPAWN_DIST:
+            if abs(ex - x) + abs(ey - y) < self.profile.spawn_dist:
                 return False
         return True
 
     def _place_structures_half(self, rng):
         # HALF-side targets; mirrored => doubled overall
+        p = self.profile
         targets = {
-            "water_lines": rng.randint(map_sliders.MIN_WATER_LINE, map_sliders.MAX_WATER_LINE),
-            "wall_blocks": rng.randint(map_sliders.MIN_WALL_BLOCKS, map_sliders.MAX_WALL_BLOCKS),
-            "cover_clusters": rng.randint(map_sliders.MIN_COVER_CLUSTERS, map_sliders.MAX_COVER_CLUSTERS),
-            "bush_patches": rng.randint(map_sliders.MIN_BUSH_PATCHES, map_sliders.MAX_BUSH_PATCHES),
-            "boxes": rng.randint(map_sliders.MIN_BOXES, map_sliders.MAX_BOXES),
+            "water_lines": rng.randint(p.min_water_line, p.max_water_line),
+            "wall_blocks": rng.randint(p.min_wall_blocks, p.max_wall_blocks),
+            "cover_clusters": rng.randint(p.min_cover_clusters, p.max_cover_clusters),
+            "bush_patches": rng.randint(p.min_bush_patches, p.max_bush_patches),
+            "boxes": rng.randint(p.min_boxes, p.max_boxes),
         }
 
         # WATER: thicker/longer, plus some reservoirs
         for _ in range(targets["water_lines"]):
             if rng.random() < 0.55:
-                self._try_stamp_line_half(rng, WATER, min_len=14, max_len=28, thickness=rng.randint(2,3))
+                self._try_stamp_line_half(rng, WATER, min_len=self._dim(14), max_len=self._dim(28), thickness=self._span(rng, 2, 3))
             else:
-                self._try_stamp_rect_half(rng, WATER, w=rng.randint(5,9), h=rng.randint(10,16))
+                self._try_stamp_rect_half(rng, WATER, w=self._span(rng, 5, 9), h=self._span(rng, 10, 16))
 
         # WALL blocks: medium rectangles
         for _ in range(targets["wall_blocks"]):
-            self._try_stamp_rect_half(rng, WALL, w=rng.randint(4,10), h=rng.randint(4,10))
+            self._try_stamp_rect_half(rng, WALL, w=self._span(rng, 4, 10), h=self._span(rng, 4, 10))
 
         # COVER clusters: tighter blobs
         for _ in range(targets["cover_clusters"]):
-            self._try_stamp_blob_half(rng, COVER, radius=rng.randint(3,5), p=0.7)
+            self._try_stamp_blob_half(rng, COVER, radius=self._span(rng, 3, 5), p=0.7)
 
         # BOX clumps: more frequent
         for _ in range(targets["boxes"]):
-            self._try_stamp_rect_half(rng, BOX, w=rng.randint(2,10), h=rng.randint(2,10))
+            self._try_stamp_rect_half(rng, BOX, w=self._span(rng, 2, 10), h=self._span(rng, 2, 10))
 
         # BUSH patches: bigger organic areas
         for _ in range(targets["bush_patches"]):
-            self._try_stamp_blob_half(rng, BUSH, radius=rng.randint(4,7), p=0.7)
+            self._try_stamp_blob_half(rng, BUSH, radius=self._span(rng, 4, 7), p=0.7)
 
 
     # ---- helper functions for generating half maps
+    def _dim(self, n):
+        # structure sizes are written for 60x60; profiles for bigger maps scale them
+        return max(1, round(n * self.profile.structure_scale))
+
+    def _span(self, rng, lo, hi):
+        return rng.randint(self._dim(lo), self._dim(hi))
+
     def _half_bounds(self):
-        if self.symmetry_axis == "vertical":
-            return (0, self.rows-1, 0, (self.cols//2)-1)  # y0,y1,x0,x1 (inclusive)
-        else:
-            return (0, (self.rows//2)-1, 0, self.cols-1)
+        return symmetry.canonical_half(self.rows, self.cols, self.symmetry_axis)  # y0,y1,x0,x1 (inclusive)
 
     def _try_stamp_line_half(self, rng, tile, min_len, max_len, thickness=1):
         y0, y1, x0, x1 = self._half_bounds()
-        if self.symmetry_axis == "vertical":
+        if symmetry.splits_columns(self.symmetry_axis):
             x = rng.randint(x0+2, x1-2)
             y_start = rng.randint(y0+2, y1-2)
             length = rng.randint(min_len, max_len)
@@ -125,11 +150,13 @@ class BrawlStarsMap:
                 xL, xR = x, x + thickness - 1
                 if self._area_clear_with_clearance(xL, min(y_start,y_end), xR, max(y_start,y_end)):
                     self._paint_line((x, y_start), (x, y_end), tile, thickness)
+                    return True
             else:
                 x_end = max(x0+2, min(x1-2, x + (rng.choice([-1,1]) * length)))
                 yT, yB = y_start, y_start + thickness - 1
                 if self._area_clear_with_clearance(min(x, x_end), yT, max(x, x_end), yB):
                     self._paint_line((x, y_start), (x_end, y_start), tile, thickness)
+                    return True
         else:
             y = rng.randint(y0+2, y1-2)
             x_start = rng.randint(x0+2, x1-2)
@@ -140,11 +167,15 @@ class BrawlStarsMap:
                 yT, yB = y, y + thickness - 1
                 if self._area_clear_with_clearance(min(x_start,x_end), yT, max(x_start,x_end), yB):
                     self._paint_line((x_start, y), (x_end, y), tile, thickness)
+                    return True
             else:
                 y_end = max(y0+2, min(y1-2, y + (rng.choice([-1,1]) * length)))
                 xL, xR = x_start, x_start + thickness - 1
                 if self._area_clear_with_clearance(xL, min(y,y_end), xR, max(y,y_end)):
                     self._paint_line((x_start, y), (x_start, y_end), tile, thickness)
+                    return True
+        profiling.count("failed_stamps")
+        return False
 
     def _try_stamp_rect_half(self, rng, tile, w, h):
         y0, y1, x0, x1 = self._half_bounds()
@@ -152,6 +183,9 @@ class BrawlStarsMap:
         y = rng.randint(y0+2, max(y0+2, y1 - h - 1))
         if self._area_clear_with_clearance(x, y, x+w-1, y+h-1):
             self._paint_rect(x, y, w, h, tile)
+            return True
+        profiling.count("failed_stamps")
+        return False
 
     def _try_stamp_blob_half(self, rng, tile, radius=4, p=0.6):
         y0, y1, x0, x1 = self._half_bounds()
@@ -160,6 +194,9 @@ class BrawlStarsMap:
         xL, xR, yT, yB = cx - radius, cx + radius, cy - radius, cy + radius
         if self._area_clear_with_clearance(xL, yT, xR, yB):
             self._paint_blob(cx, cy, radius, tile, p)
+            return True
+        profiling.count("failed_stamps")
+        return False
     
     def _paint_line(self, a, b, tile, thickness=1):
         x0, y0 = a; x1, y1 = b
@@ -226,84 +263,93 @@ class BrawlStarsMap:
                         self.map[yy][xx] = WALKABLE
 
     def _apply_symmetry(self):
-        if self.symmetry_axis == "vertical":
-            for y in range(self.rows):
-                for x in range(self.cols // 2):
-                    mirror_x = self.cols - 1 - x
-                    self.map[y][mirror_x] = self.map[y][x]
-        else:
-            for y in range(self.rows // 2):
-                mirror_y = self.rows - 1 - y
-                self.map[mirror_y] = list(self.map[y])
+        symmetry.apply_symmetry(self.map, self.symmetry_axis)
 
     def _reimpose_symmetry(self):
         self._apply_symmetry()
 
+    @profiling.timed("connectivity_repair")
     def _ensure_spawn_connectivity(self):
         spawns = [(x, y) for (y, x) in get_positions(self.map, SPAWN)]
         if not spawns:
             return
         root = spawns[0]
-        reachable = self._bfs_passable_from(root)
-        if all(s in reachable for s in spawns):
+        lay = bitboards.layout(self.rows, self.cols)
+        reachable = self._bfs_passable_from([root])
+        if all(lay.test(reachable, x, y) for (x, y) in spawns):
             return
         # carve minimal corridors from root to each unreachable spawn
         for s in spawns:
-            if s not in reachable:
+            if not lay.test(reachable, *s):
                 path = self._bfs_any_cost(root, s)  # path through anything
+                profiling.count("corridors_carved")
                 if path:
+                    # carve the mirrored corridor too so the map stays symmetric
+                    path += [symmetry.mirror(x, y, self.rows, self.cols, self.symmetry_axis) for (x, y) in path]
                     for (x, y) in path:
                         if self.map[y][x] in OBSTACLE:
                             self.map[y][x] = WALKABLE
                     # keep a little space around the corridor
                     self._clearance_halo_along_path(path)
-                # recompute reachability after each carve
-                reachable = self._bfs_passable_from(root)
-
-    def _bfs_passable_from(self, start):
-        sx, sy = start
-        q = collections.deque([(sx, sy)])
-        seen = {start}
-        while q:
-            x, y = q.popleft()
-            for nx, ny in ((x+1,y),(x-1,y),(x,y+1),(x,y-1)):
-                if 0 <= nx < self.cols and 0 <= ny < self.rows:
-                    if (nx, ny) not in seen and self.map[ny][nx] in PASSABLE:
-                        seen.add((nx, ny))
-                        q.append((nx, ny))
-        return seen
+                    # carving only opens tiles, and everything it opened touches the
+                    # path, so growing the old region from the path is enough
+                    reachable = self._bfs_passable_from(path, reachable)
+
+    def _bfs_passable_from(self, starts, seen=0):
+        # bitboard of everything connected to the (x, y) starts, plus seen
+        lay = bitboards.layout(self.rows, self.cols)
+        return lay.flood(lay.bits(starts) | seen, lay.board(self.map, PASSABLE))
 
     def _bfs_any_cost(self, start, goal):
-        sx, sy = start; gx, gy = goal
-        q = collections.deque([(sx, sy)])
-        parent = { (sx, sy): None }
-        while q:
-            x, y = q.popleft()
-            if (x, y) == (gx, gy):
-                break
-            for nx, ny in ((x+1,y),(x-1,y),(x,y+1),(x,y-1)):
-                if 0 <= nx < self.cols and 0 <= ny < self.rows:
-                    if (nx, ny) not in parent:
-                        parent[(nx, ny)] = (x, y)
-                        q.append((nx, ny))
-        if (gx, gy) not in parent: return None
-        # reconstruct
-        path = []
-        cur = (gx, gy)
-        while cur is not None:
-            path.append(cur)
-            cur = parent[cur]
-        path.reverse()
+        # Ignoring tile costs every monotone path is a shortest one, so walk
+        # along x, then along y, instead of searching the grid.
+        (sx, sy), (gx, gy) = start, goal
+        dx = 1 if gx >= sx else -1
+        dy = 1 if gy >= sy else -1
+        path = [(x, sy) for x in range(sx, gx + dx, dx)]
+        path += [(gx, y) for y in range(sy + dy, gy + dy, dy)]
         return path
 
     def _clearance_halo_along_path(self, path):
-        c = max(self.clearance, CORRIDOR_WIDTH - 1)
-        for (x, y) in path:
-            for yy in range(max(0, y - c), min(self.rows, y + c + 1)):
-                for xx in range(max(0, x - c), min(self.cols, x + c + 1)):
-                    if self.map[yy][xx] != SPAWN:
-                        self.map[yy][xx] = WALKABLE
-
+        c = max(self.clearance, self.profile.corridor_width - 1)
+        lay = bitboards.layout(self.rows, self.cols)
+        for y, x0, x1 in lay.spans(lay.grow(lay.bits(path), c)):
+            row = self.map[y]
+            row[x0:x1] = [t if t == SPAWN else WALKABLE for t in row[x0:x1]]
+
+    def _repair_boxes(self):
+        # Drop mirrored box pairs (from the bottom of the canonical half up) until
+        # the count is back in range; too few boxes cannot be fixed here.
+        excess = tile_counts(self.map)[BOX] - box_count_range(self.rows, self.cols)[1]
+        if excess <= 0:
+            return
+        y0, y1, x0, x1 = self._half_bounds()
+        for y in range(y1, y0 - 1, -1):
+            for x in range(x1, x0 - 1, -1):
+                if excess <= 0:
+                    break
+                if self.map[y][x] == BOX:
+                    self.map[y][x] = WALKABLE
+                    excess -= 2
+        self._reimpose_symmetry()
+        profiling.count("box_repairs")
+
+    def feasible_or_repair(self, rng):
+        """Hard-constraint pre-filter for fresh children; repairs what it cheaply can."""
+        counts = tile_counts(self.map)
+        if passes_hard_constraints(self.map, counts, self.hard_constraints):
+            return True
+        if counts[SPAWN] != SPAWN_COUNT:
+            self._repair_spawns(rng)
+        if counts[BOX] > box_count_range(self.rows, self.cols)[1]:
+            self._repair_boxes()
+        return passes_hard_constraints(self.map, constraints=self.hard_constraints)
+
+    def content_hash(self):
+        """Hash of the grid contents; equal maps hash equal. Recompute after any edit."""
+        return hash(grid_key(self.map))
+
+    @profiling.timed("mutation")
     def mutate(self, rng):
         op = rng.choices(
             ["add_element", "remove_area", "shift_area", "bush_patch"],
@@ -314,18 +360,18 @@ class BrawlStarsMap:
         if op == "add_element":
             choice = rng.random()
             if choice < 0.25:
-                self._try_stamp_line_half(rng, WATER, min_len=8, max_len=20, thickness=rng.randint(1,2))
+                self._try_stamp_line_half(rng, WATER, min_len=self._dim(8), max_len=self._dim(20), thickness=self._span(rng, 1, 2))
             elif choice < 0.55:
-                self._try_stamp_rect_half(rng, WALL, w=rng.randint(3,7), h=rng.randint(3,7))
+                self._try_stamp_rect_half(rng, WALL, w=self._span(rng, 3, 7), h=self._span(rng, 3, 7))
             elif choice < 0.80:
-                self._try_stamp_blob_half(rng, COVER, radius=rng.randint(2,4), p=0.6)
+                self._try_stamp_blob_half(rng, COVER, radius=self._span(rng, 2, 4), p=0.6)
             else:
-                self._try_stamp_rect_half(rng, BOX, w=rng.randint(1,3), h=rng.randint(1,3))
+                self._try_stamp_rect_half(rng, BOX, w=self._span(rng, 1, 3), h=self._span(rng, 1, 3))
 
         elif op == "remove_area":
             # randomly wipe a small rect on half (acts like cleanup)
             y0, y1, x0, x1 = self._half_bounds()
-            w, h = rng.randint(2,6), rng.randint(2,6)
+            w, h = self._span(rng, 2, 6), self._span(rng, 2, 6)
             x = rng.randint(x0, max(x0, x1 - w + 1))
             y = rng.randint(y0, max(y0, y1 - h + 1))
             for yy in range(y, y+h):
@@ -336,7 +382,7 @@ class BrawlStarsMap:
         elif op == "shift_area":
             # pick a small rect, clear it, and re-stamp nearby
             y0, y1, x0, x1 = self._half_bounds()
-            w, h = rng.randint(3,6), rng.randint(3,6)
+            w, h = self._span(rng, 3, 6), self._span(rng, 3, 6)
             sx = rng.randint(x0, max(x0, x1 - w + 1))
             sy = rng.randint(y0, max(y0, y1 - h + 1))
             tiles = []
@@ -352,98 +398,481 @@ class BrawlStarsMap:
                 self._try_stamp_blob_half(rng, COVER, radius=max(2, min(w, h)//2), p=0.6)
 
         else:  # bush_patch
-            self._try_stamp_blob_half(rng, BUSH, radius=rng.randint(3,6), p=0.7)
+            self._try_stamp_blob_half(rng, BUSH, radius=self._span(rng, 3, 6), p=0.7)
 
         # Re-impose symmetry & ensure connectivity after mutation
         self._reimpose_symmetry()
         self._ensure_spawn_connectivity()
 
+    def random_like(self, rng):
+        """A fresh random map of the same class, size, symmetry and profile."""
+        return type(self).random_map(rng=rng, size=(self.rows, self.cols), symmetry_axis=self.symmetry_axis,
+                                     clearance=self.clearance, profile=self.profile)
+
+    @profiling.timed("crossover")
     def crossover(self, other, rng):
-        child = BrawlStarsMap(size=(self.rows, self.cols),
-                              symmetry_axis=self.symmetry_axis,
-                              clearance=self.clearance)
+        child = type(self)(size=(self.rows, self.cols),
+                           symmetry_axis=self.symmetry_axis,
+                           clearance=self.clearance,
+                           profile=self.profile)
         split_point = rng.randint(0, self.cols - 1)
         for y in range(self.rows):
-            for x in range(self.cols):
-                child.map[y][x] = self.map[y][x] if x <= split_point else other.map[y][x]
+            child.map[y] = self.map[y][:split_point + 1] + other.map[y][split_point + 1:]
         child._repair_spawns(rng)
         # Make the child symmetric and connected
         child._reimpose_symmetry()
         child._ensure_spawn_connectivity()
         return child
 
+    @profiling.timed("spawn_repair")
     def _repair_spawns(self, rng):
-        spawns = get_positions(self.map, SPAWN)  # list of (y, x)
-        # Clamp to 10; if too many remove extras farthest from center
-        while len(spawns) > 10:
-            y, x = spawns.pop()
-            self.map[y][x] = WALKABLE
-        # Add missing in symmetric pairs on half
+        # spawns are only ever added or removed in mirrored pairs, so start
+        # from a symmetric map
+        self._reimpose_symmetry()
+        y0, y1, x0, x1 = self._half_bounds()
         while True:
-            spawns = get_positions(self.map, SPAWN)
-            if len(spawns) >= 10:
+            spawns = get_positions(self.map, SPAWN)  # list of (y, x)
+            if len(spawns) == SPAWN_COUNT:
                 break
-            y0, y1, x0, x1 = self._half_bounds()
+            if len(spawns) > SPAWN_COUNT:
+                # drop the last canonical-half spawn, reimposing symmetry drops its
+                # partner; an odd excess means a spawn on the mirror line (its own
+                # partner, outside the half), drop that one instead
+                own = [(y, x) for (y, x) in spawns
+                       if symmetry.mirror(x, y, self.rows, self.cols, self.symmetry_axis) == (x, y)]
+                half = [(y, x) for (y, x) in spawns if y0 <= y <= y1 and x0 <= x <= x1]
+                odd = (len(spawns) - SPAWN_COUNT) % 2
+                y, x = own[-1] if own and (odd or not half) else half[-1]
+                self.map[y][x] = WALKABLE
+                self._reimpose_symmetry()
+                continue
+            # add missing ones in symmetric pairs on half
             x = rng.randint(x0+2, x1-2)
             y = rng.randint(y0+2, y1-2)
             if self.map[y][x] == WALKABLE:
                 self.map[y][x] = SPAWN
                 self._reimpose_symmetry()
-
-
-
-def run_ga(population_size=50, generations=100, seed=None):
+            else:
+                profiling.count("spawn_repair_retries")
+
+
+
+def run_ga(population_size=50, generations=100, seed=None, log_path=None, profile_path=None, recorder=None,
+           max_child_tries=5, patience=None, target_fitness=None, time_budget=None, max_evaluations=None,
+           mutation_rate=0.99, min_mutation_rate=0.3, max_mutation_rate=1.0, deadline=None, verbose=True,
+           size=None, symmetry_axis=None, on_generation=None, profile=None, duplicates="keep",
+           heavy_mutations=5, surrogate=None, screen_quantile=0.5, screen_tries=3, prune_quantile=None,
+           initial_population=None):
+    """
+    Evolve maps and return the best one.
+    Children failing the hard constraints are repaired or replaced (up to
+    max_child_tries attempts) before they reach the evaluator.
+    log_path writes one JSON line of timings/counters per generation,
+    profile_path dumps cProfile stats for the whole run.
+
+    Stopping: runs until any of generations (None = unbounded), patience
+    (generations without improvement), target_fitness, time_budget
+    (seconds), deadline (a time.monotonic() timestamp) or max_evaluations
+    is hit. The reason is printed and kept on the returned map as
+    stop_reason. Time limits are also checked between individuals, so a
+    run can end mid-generation; the best map evaluated so far is returned.
+
+    The mutation rate starts at mutation_rate and adapts each generation:
+    it decays after an improvement and grows while the best is stagnant,
+    clamped to [min_mutation_rate, max_mutation_rate].
+
+    profile is a map_sliders.GenerationProfile (default: the module sliders);
+    size and symmetry_axis, when given, override it.
+
+    on_generation, if given, is called with a small progress dict after
+    every generation (used by service.py to stream job progress).
+
+    Clones: individuals are keyed by content_hash. A map already scored in
+    the previous generation (elites, re-created clones) reuses that score
+    instead of being evaluated again, and elites are picked from distinct
+    maps. duplicates says what to do with a child identical to one already
+    in the next generation: "keep" it, replace it with a fresh "random"
+    map, or "mutate" it heavy_mutations times.
+
+    surrogate (a surrogate.Surrogate) pre-screens children: once trained on
+    enough evaluations, a child predicted clearly below the population's
+    screen_quantile fitness is discarded before evaluation and another is
+    bred, up to screen_tries times per slot. Every real evaluation trains
+    the model, and its prediction error goes to the per-generation log.
+
+    prune_quantile turns on staged evaluation (evaluate_map_fitness cutoff):
+    a child whose upper bound cannot reach the previous generation's
+    fitness at that quantile from the top (e.g. 0.1: the elite) skips the
+    expensive terms and keeps the bound as its fitness.
+
+    initial_population starts the run from these maps instead of random
+    ones (topped up with random maps if there are fewer than
+    population_size). Children are built by the parents' own class, so a
+    BrawlStarsMap subclass with its own operators evolves as that class.
+    """
+    if duplicates not in ("keep", "random", "mutate"):
+        raise ValueError(f"unknown duplicates mode {duplicates!r}, expected keep, random or mutate")
+    if prune_quantile is not None and not 0 < prune_quantile < 1:
+        raise ValueError(f"prune_quantile must be in (0, 1), got {prune_quantile!r}")
     rng = random.Random(seed)
+    if recorder is None and (log_path or profile_path):
+        recorder = profiling.GARecorder(log_path=log_path, profile_path=profile_path)
+    if recorder is not None:
+        recorder.start()
+
+    start = time.monotonic()
+    if time_budget is not None:
+        budget_end = start + time_budget
+        deadline = budget_end if deadline is None else min(deadline, budget_end)
+
+    def expired():
+        return deadline is not None and time.monotonic() >= deadline
+
+    best = None
+    stale = 0
+    evaluations = 0
+    stop_reason = "generations"
+    scored = {}                     # content_hash -> (fitness, breakdown) of the last generation
+    prune_cutoff = None             # staged-evaluation cutoff, from the previous generation
+
+    try:
+        with profiling.phase("initialization"):
+            population = list(initial_population or ())[:population_size]
+            while len(population) < population_size:
+                # top up with maps like the given ones (e.g. coarse layouts)
+                population.append(population[0].random_like(rng) if population else
+                                  BrawlStarsMap.random_map(rng=rng, size=size, symmetry_axis=symmetry_axis,
+                                                           profile=profile))
+                if expired():
+                    break
+
+        gen = 0
+        while True:
+            # Evaluate fitness (always at least one individual so there is a best)
+            with profiling.phase("evaluation"):
+                evaluated = []
+                known = {}
+                for ind in population:
+                    if evaluated and expired():
+                        profiling.count("skipped_evaluations", len(population) - len(evaluated))
+                        break
+                    key = ind.content_hash()
+                    if key in known or key in scored:
+                        ind.fitness, ind.breakdown = known.get(key) or scored[key]
+                        profiling.count("duplicate_evaluations_skipped")
+                    else:
+                        ind.fitness, ind.breakdown = evaluate_map_fitness(ind.map, breakdown=True, cutoff=prune_cutoff,
+                                                                            hard_constraints=ind.hard_constraints,
+                                                                            soft_terms=ind.soft_terms)
+                        evaluations += 1
+                        if surrogate is not None and not ind.breakdown.get("pruned"):
+                            surrogate.update(ind.features or surrogate.features(ind.map), ind.fitness)
+                    known[key] = (ind.fitness, ind.breakdown)
+                    evaluated.append(ind)
+                scored = known
+                population = evaluated
+
+            # Sort by fitness
+            with profiling.phase("selection"):
+                population.sort(key=lambda x: x.fitness, reverse=True)
+                if prune_quantile is not None:
+                    exact = [ind.fitness for ind in population if not ind.breakdown.get("pruned")]
+                    prune_cutoff = exact[int((len(exact) - 1) * prune_quantile)]
+            if verbose:
+                print(f"Generation {gen}: Best fitness = {population[0].fitness}")
+
+            if best is None or population[0].fitness > best.fitness:
+                best = population[0]
+                stale = 0
+                mutation_rate = max(min_mutation_rate, mutation_rate * 0.9)
+            else:
+                stale += 1
+                mutation_rate = min(max_mutation_rate, mutation_rate / 0.9)
+
+            if recorder is not None:
+                scores = [ind.fitness for ind in population]
+                recorder.end_generation(gen, best=scores[0], mean=sum(scores) / len(scores),
+                                        mutation_rate=mutation_rate, evaluations=evaluations,
+                                        best_breakdown=population[0].breakdown,
+                                        population_terms=profiling.summarize_breakdowns(
+                                            [ind.breakdown for ind in population]),
+                                        **(surrogate.drain_errors() if surrogate is not None else {}))
+            if on_generation is not None:
+                on_generation({"gen": gen, "best": population[0].fitness, "evaluations": evaluations,
+                               "elapsed": time.monotonic() - start})
+
+            gen += 1
+            reason = _stop_reason(gen, generations, stale, patience, best.fitness, target_fitness,
+                                  expired(), evaluations, max_evaluations)
+            if reason:
+                stop_reason = reason
+                break
 
-    population = [BrawlStarsMap.random_map(rng=rng) for _ in range(population_size)]
-
-    for gen in range(generations):
-        # Evaluate fitness
-        for ind in population:
-            ind.fitness = evaluate_map_fitness(ind.map)
-
-        # Sort by fitness
-        population.sort(key=lambda x: x.fitness, reverse=True)
-        print(f"Generation {gen}: Best fitness = {population[0].fitness}")
-
-        # Selection and reproduction
-        new_population = []
-        elite_count = max(1, population_size // 10)
-        new_population.extend(copy.deepcopy(population[:elite_count]))
-
-        while len(new_population) < population_size:
-            p1 = tournament_select(population, rng)
-            p2 = tournament_select(population, rng)
-            child = p1.crossover(p2, rng)
-            if rng.random() < 0.99:  # mutation rate
-                child.mutate(rng)
-            new_population.append(child)
-
-        population = new_population
+            # Selection and reproduction
+            new_population = []
+            elite_count = max(1, population_size // 10)
+            with profiling.phase("selection"):
+                # the best elite_count distinct maps
+                elites = {}
+                for ind in population:
+                    if len(elites) == elite_count:
+                        break
+                    elites.setdefault(ind.content_hash(), ind)
+                new_population.extend(copy.deepcopy(list(elites.values())))
+            present = set(elites)
+            if surrogate is not None:
+                screen_cutoff = population[int((len(population) - 1) * (1 - screen_quantile))].fitness
+
+            while len(new_population) < population_size and not expired():
+                for _ in range(screen_tries + 1 if surrogate is not None else 1):
+                    for _ in range(max_child_tries):
+                        with profiling.phase("selection"):
+                            p1 = tournament_select(population, rng)
+                            p2 = tournament_select(population, rng)
+                        child = p1.crossover(p2, rng)
+                        if rng.random() < mutation_rate:
+                            child.mutate(rng)
+                        # infeasible children would score 0; repair or retry before evaluation
+                        if child.feasible_or_repair(rng):
+                            break
+                        profiling.count("discarded_children")
+                    if surrogate is None:
+                        break
+                    child.features = surrogate.features(child.map)
+                    if not surrogate.clearly_below(child.features, screen_cutoff):
+                        break
+                    profiling.count("surrogate_rejects")
+                key = child.content_hash()
+                if key in present:
+                    profiling.count("duplicate_children")
+                    if duplicates != "keep":
+                        child = _replace_duplicate(child, duplicates, heavy_mutations, rng)
+                        key = child.content_hash()
+                present.add(key)
+                new_population.append(child)
+
+            if expired():
+                stop_reason = "time_budget"
+                break
+            population = new_population
+    finally:
+        if recorder is not None:
+            recorder.stop()
+
+    if verbose:
+        print(f"Stopped after {gen} generations: {stop_reason}")
+    best.stop_reason = stop_reason
+    return best
+
+def _replace_duplicate(child, mode, heavy_mutations, rng):
+    """A fresh random map like child, or child mutated heavy_mutations times (falling back to random if that breaks it)."""
+    if mode == "mutate":
+        child.features = None                   # screened before mutating; recomputed for the surrogate
+        for _ in range(heavy_mutations):
+            child.mutate(rng)
+        if child.feasible_or_repair(rng):
+            return child
+    return child.random_like(rng)
+
+def _stop_reason(gen, generations, stale, patience, best_fitness, target_fitness,
+                 out_of_time, evaluations, max_evaluations):
+    if target_fitness is not None and best_fitness >= target_fitness:
+        return "target_fitness"
+    if patience is not None and stale >= patience:
+        return "patience"
+    if out_of_time:
+        return "time_budget"
+    if max_evaluations is not None and evaluations >= max_evaluations:
+        return "max_evaluations"
+    if generations is not None and gen >= generations:
+        return "generations"
+    return None
+
+def generate(deadline=None, time_budget=None, population_size=30, seed=None, **kwargs):
+    """
+    Anytime generation: keep evolving until the deadline (a time.monotonic()
+    timestamp) or time_budget (seconds from now) and return the best map
+    found by then, e.g. generate(time_budget=2.0).
+    Extra keyword arguments go to run_ga (patience, target_fitness, ...).
+    """
+    if deadline is None and time_budget is None:
+        raise ValueError("generate() needs a deadline or a time_budget")
+    kwargs.setdefault("verbose", False)
+    kwargs.setdefault("generations", None)
+    return run_ga(population_size=population_size, seed=seed,
+                  deadline=deadline, time_budget=time_budget, **kwargs)
+
+# ---- Steady-state mode: no generation barrier
+def _steady_random(seed, map_kwargs):
+    random.seed(seed)                       # stamping helpers use the global RNG
+    ind = BrawlStarsMap.random_map(rng=random.Random(seed), **map_kwargs)
+    ind.fitness, ind.breakdown = evaluate_map_fitness(ind.map, breakdown=True)
+    return ind
+
+def _steady_child(p1, p2, seed, mutation_rate, max_child_tries):
+    # runs in a worker: breed, repair and evaluate one child
+    random.seed(seed)
+    rng = random.Random(seed)
+    for _ in range(max_child_tries):
+        child = p1.crossover(p2, rng)
+        if rng.random() < mutation_rate:
+            child.mutate(rng)
+        if child.feasible_or_repair(rng):
+            break
+    child.fitness, child.breakdown = evaluate_map_fitness(child.map, breakdown=True)
+    return child
+
+def _steady_worker_init():
+    import ga  # noqa: F401  -- pay the import cost once per worker
+    kernels.warm_up()
+
+def run_steady_state(population_size=50, max_evaluations=None, seed=None, workers=None, time_budget=None,
+                     deadline=None, target_fitness=None, patience=None, mutation_rate=0.99, max_child_tries=5,
+                     in_flight=None, verbose=True, size=None, symmetry_axis=None, profile=None,
+                     on_generation=None, recorder=None, log_path=None):
+    """
+    Steady-state GA for long runs: a process pool keeps breeding and
+    evaluating children, and every finished child replaces the worst
+    individual if it is better and not a clone (content_hash). Parents are
+    drawn from the population as it is at submit time, so a slow child
+    never holds the others up.
+
+    workers is the pool size (None = CPU count, 1 = run in this process).
+    in_flight children are kept queued (default 2 per worker) so workers
+    never wait for the main process. Stops on max_evaluations,
+    time_budget / deadline, target_fitness or patience, counted like run_ga
+    in "generations" of population_size children.
+    on_generation / recorder / log_path report once per population_size
+    finished children. Returns the best map with stop_reason set.
+    """
+    import concurrent.futures       # ~10 ms, only paid by steady-state runs
 
-    return population[0]
+    rng = random.Random(seed)
+    if recorder is None and log_path:
+        recorder = profiling.GARecorder(log_path=log_path)
+    if recorder is not None:
+        recorder.start()
+    start = time.monotonic()
+    if time_budget is not None:
+        budget_end = start + time_budget
+        deadline = budget_end if deadline is None else min(deadline, budget_end)
+    map_kwargs = dict(size=size, symmetry_axis=symmetry_axis, profile=profile)
+    workers = workers or os.cpu_count() or 1
+    pool = None
+    if workers != 1:
+        pool = concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_steady_worker_init)
+    in_flight = in_flight or 2 * workers
+
+    def submit(fn, *args):
+        if pool is None:
+            future = concurrent.futures.Future()
+            future.set_result(fn(*args))
+            return future
+        return pool.submit(fn, *args)
+
+    def expired():
+        return deadline is not None and time.monotonic() >= deadline
+
+    def new_seed():
+        return rng.randrange(2 ** 32)
+
+    population = []
+    present = set()
+    best = None
+    evaluations = randoms = 0
+    gen = stale = 0
+    improved = False
+    stop_reason = None
+    pending = set()
+    try:
+        while True:
+            # top up: random maps until the population is seeded, then children
+            # bred from the population as it is right now
+            while len(pending) < in_flight:
+                if randoms < population_size:
+                    pending.add(submit(_steady_random, new_seed(), map_kwargs))
+                    randoms += 1
+                elif len(population) >= 2:
+                    k = min(3, len(population))
+                    p1, p2 = tournament_select(population, rng, k), tournament_select(population, rng, k)
+                    pending.add(submit(_steady_child, p1, p2, new_seed(), mutation_rate, max_child_tries))
+                else:
+                    break
+            if not pending:
+                break
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            done, pending = concurrent.futures.wait(pending, timeout=timeout,
+                                                    return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                child = future.result()
+                evaluations += 1
+                key = child.content_hash()
+                if key in present:
+                    profiling.count("duplicate_children")
+                elif len(population) < population_size:
+                    population.append(child)
+                    present.add(key)
+                else:
+                    worst = min(range(len(population)), key=lambda i: population[i].fitness)
+                    if child.fitness > population[worst].fitness:
+                        present.discard(population[worst].content_hash())
+                        population[worst] = child
+                        present.add(key)
+                if best is None or child.fitness > best.fitness:
+                    best = child
+                    improved = True
+
+                if evaluations % population_size == 0:
+                    stale = 0 if improved else stale + 1
+                    improved = False
+                    if verbose:
+                        print(f"Generation {gen}: Best fitness = {best.fitness}")
+                    if recorder is not None:
+                        scores = [ind.fitness for ind in population]
+                        recorder.end_generation(gen, best=best.fitness, mean=sum(scores) / len(scores),
+                                                evaluations=evaluations, in_flight=len(pending))
+                    if on_generation is not None:
+                        on_generation({"gen": gen, "best": best.fitness, "evaluations": evaluations,
+                                       "elapsed": time.monotonic() - start})
+                    gen += 1
+                stop_reason = stop_reason or _stop_reason(gen, None, stale, patience, best.fitness,
+                                                          target_fitness, expired(), evaluations,
+                                                          max_evaluations)
+            if best is not None and stop_reason is None and expired():
+                stop_reason = "time_budget"
+            if stop_reason is not None:
+                break
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        if recorder is not None:
+            recorder.stop()
+
+    stop_reason = stop_reason or "exhausted"
+    if verbose:
+        print(f"Stopped after {evaluations} evaluations: {stop_reason}")
+    best.stop_reason = stop_reason
+    return best
 
 def tournament_select(population, rng, tournament_size=3):
     contestants = rng.sample(population, tournament_size)
     return max(contestants, key=lambda x: x.fitness)
 
 
-# ---- Export for Unity (IDs) ----
-ID_MAP = {
-    WALKABLE: 0,
-    WALL:     1,
-    BUSH:     2,
-    SPAWN:    3,
-    COVER:    4,
-    WATER:    5,
-    BOX:      6,
-}
+# ---- Export for Unity (IDs from the shared legend in map/tiles.py) ----
+ID_MAP = NAME_TO_ID
+TILE_FROM_ID = ID_TO_NAME
 
 def save_map_txt_strgrid(str_grid, path):
     with open(path, "w", newline="\n") as f:
         for row in str_grid:
             f.write(" ".join(str(ID_MAP.get(cell, 0)) for cell in row) + "\n")
 
+def load_map_txt_strgrid(path):
+    # inverse of save_map_txt_strgrid; unknown ids load as WALKABLE
+    with open(path) as f:
+        return [[TILE_FROM_ID.get(int(x), WALKABLE) for x in line.split()] for line in f if line.strip()]
+
 
 if __name__ == "__main__":
     best_map = run_ga(population_size=60, generations=80)  # seed=None => different each run
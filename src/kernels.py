@@ -0,0 +1,184 @@
+"""
+Grid traversal kernels with an optional Numba backend.
+
+Masks are flat row-major bytes (index = y * cols + x), 1 where a tile
+can be entered; build them with mask_of(grid, tiles). Every kernel has a
+pure-Python implementation (on flat bytearrays, or on a bitboard where
+that is faster), and an @njit twin over uint8 arrays that is used
+automatically when numba (and numpy) import.
+BS_KERNELS=python forces the fallback, BS_KERNELS=numba makes a missing
+numba an error.
+
+Compiled kernels are cached on disk (cache=True, next to this file in
+__pycache__), so only the very first run pays for compilation; warm_up()
+loads them up front, e.g. in a worker pool initializer.
+
+    mask = mask_of(grid, {"empty", "bush", "spawn"})
+    seen = flood_fill(mask, cols, [start])          # bytearray of 0/1
+    sizes = component_sizes(mask_of(grid, {"wall"}), cols)
+"""
+import os
+from itertools import chain
+
+import bitboards
+
+BACKEND = "python"                  # "numba" once the compiled kernels are in use
+
+
+def mask_of(grid, tiles):
+    """Flat bytearray, 1 where the tile type is in tiles."""
+    return bytearray(map(frozenset(tiles).__contains__, chain.from_iterable(grid)))
+
+
+# ---- pure Python
+
+def _py_fill(mask, cols, starts, seen):
+    # returns how many tiles were newly marked
+    n = len(mask)
+    last = cols - 1
+    stack = list(starts)
+    added = 0
+    for i in stack:
+        added += not seen[i]
+        seen[i] = 1
+    while stack:
+        i = stack.pop()
+        x = i % cols
+        for j in (i - cols, i + cols, i - 1 if x else -1, i + 1 if x != last else -1):
+            if 0 <= j < n and mask[j] and not seen[j]:
+                seen[j] = 1
+                stack.append(j)
+                added += 1
+    return added
+
+
+def _py_count(mask, cols, start):
+    # whole-row shifts on a bitboard beat a per-tile BFS in pure Python
+    lay = bitboards.layout(len(mask) // cols, cols)
+    return lay.flood(1 << (start // cols * lay.stride + start % cols), lay.from_mask(mask)).bit_count()
+
+
+def _py_component_sizes(mask, cols):
+    seen = bytearray(len(mask))
+    sizes = []
+    i = mask.find(1)
+    while i != -1:
+        if not seen[i]:
+            sizes.append(_py_fill(mask, cols, [i], seen))
+        i = mask.find(1, i + 1)
+    return sizes
+
+
+# ---- Numba
+
+def _build_numba():
+    import numba
+    import numpy as np
+
+    @numba.njit(cache=True, nogil=True)
+    def fill(mask, cols, starts, seen):
+        n = mask.shape[0]
+        stack = np.empty(n + starts.shape[0], np.int64)
+        top = 0
+        added = 0
+        for k in range(starts.shape[0]):
+            if not seen[starts[k]]:
+                added += 1
+            seen[starts[k]] = 1
+            stack[top] = starts[k]
+            top += 1
+        while top:
+            top -= 1
+            i = stack[top]
+            x = i % cols
+            for d in range(4):
+                if d == 0:
+                    j = i - cols
+                elif d == 1:
+                    j = i + cols
+                elif d == 2:
+                    j = i - 1 if x > 0 else -1
+                else:
+                    j = i + 1 if x < cols - 1 else -1
+                if 0 <= j < n and mask[j] and not seen[j]:
+                    seen[j] = 1
+                    stack[top] = j
+                    top += 1
+                    added += 1
+        return added
+
+    @numba.njit(cache=True, nogil=True)
+    def sizes(mask, cols):
+        n = mask.shape[0]
+        seen = np.zeros(n, np.uint8)
+        out = np.empty(n, np.int64)
+        count = 0
+        start = np.empty(1, np.int64)
+        for i in range(n):
+            if mask[i] and not seen[i]:
+                start[0] = i
+                out[count] = fill(mask, cols, start, seen)
+                count += 1
+        return out[:count]
+
+    def flood(mask, cols, starts, seen):
+        # np.frombuffer shares the bytearrays' memory, so seen is updated in place
+        return fill(np.frombuffer(mask, np.uint8), cols, np.asarray(starts, np.int64),
+                    np.frombuffer(seen, np.uint8))
+
+    def count(mask, cols, start):
+        return flood(mask, cols, [start], bytearray(len(mask)))
+
+    def component_sizes(mask, cols):
+        return sizes(np.frombuffer(mask, np.uint8), cols).tolist()
+
+    return flood, component_sizes, count
+
+
+_kernels = None
+
+
+def _backend():
+    # numba is imported on first use, not at import time, so short CLI
+    # commands that never traverse a grid do not pay for it
+    global _kernels, BACKEND
+    if _kernels is None:
+        choice = os.environ.get("BS_KERNELS", "auto")
+        _kernels = (_py_fill, _py_component_sizes, _py_count)
+        if choice != "python":
+            try:
+                _kernels = _build_numba()
+                BACKEND = "numba"
+            except ImportError:
+                if choice == "numba":
+                    raise
+    return _kernels
+
+
+def flood_fill(mask, cols, starts, seen=None):
+    """
+    Mark everything 4-connected to starts through mask in seen (a
+    bytearray, extended in place when given) and return it. Starts are
+    marked and expanded even when they are not in mask or already seen.
+    """
+    seen = bytearray(len(mask)) if seen is None else seen
+    _backend()[0](mask, cols, starts, seen)
+    return seen
+
+
+def count_reachable(mask, cols, start):
+    """Tiles 4-connected to start through mask, start included."""
+    return _backend()[2](mask, cols, start)
+
+
+def component_sizes(mask, cols):
+    """Sizes of the 4-connected components of mask, in scan order."""
+    return _backend()[1](mask, cols)
+
+
+def warm_up():
+    """Compile (or load from the disk cache) every kernel now rather than on first use."""
+    mask = bytearray(b"\x01\x01\x00\x01")
+    flood_fill(mask, 2, [0])
+    component_sizes(mask, 2)
+    return BACKEND
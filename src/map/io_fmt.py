@@ -2,12 +2,24 @@ import json, numpy as np
 from .tiles import LEGEND
 from .map_repr import BSMap
 
+# m may be a BSMap, a BrawlStarsMap or any grid BSMap.from_any accepts
+
 def save_map_json(m, path:str):
+    m = BSMap.from_any(m)
     data = {"h": int(m.grid.shape[0]), "w": int(m.grid.shape[1]),
             "grid": m.grid.astype(int).tolist(), "legend": LEGEND}
     with open(path, "w") as f: json.dump(data, f)
 
 def save_map_txt(m, path:str):
+    m = BSMap.from_any(m)
     with open(path, "w", newline="\n") as f:
         for row in m.grid:
-            f.write(" ".join(str(int(x)) for x in row) + "\n")
\ No newline at end of file
+            f.write(" ".join(str(int(x)) for x in row) + "\n")
+
+def load_map_txt(path:str) -> BSMap:
+    return BSMap(np.loadtxt(path, dtype=np.uint8, ndmin=2))
+
+def load_map_json(path:str) -> BSMap:
+    with open(path) as f:
+        data = json.load(f)
+    return BSMap(np.array(data["grid"], dtype=np.uint8))
@@ -1,6 +1,6 @@
 from dataclasses import dataclass
 import numpy as np
-from .tiles import Tile, MAP_H, MAP_W, MUTABLE_TILES
+from .tiles import Tile, MAP_H, MAP_W, MUTABLE_TILES, names_to_ids, ids_to_names
 
 @dataclass
 class BSMap:
@@ -21,10 +21,32 @@ class BSMap:
         g[h // 2, w - 3] = Tile.SPAWN_B
         return BSMap(g)
 
+    @staticmethod
+    def from_strgrid(str_grid) -> "BSMap":
+        """From a GA grid (rows of tile names, e.g. BrawlStarsMap.map)."""
+        return BSMap(np.array(names_to_ids(str_grid), dtype=np.uint8))
+
+    @staticmethod
+    def from_any(m) -> "BSMap":
+        """BSMap, BrawlStarsMap, GA string grid, id grid or uint8 array -> BSMap (arrays are not copied)."""
+        if isinstance(m, BSMap):
+            return m
+        grid = getattr(m, "map", m)
+        if isinstance(grid, np.ndarray):
+            return BSMap(grid.astype(np.uint8, copy=False))
+        if len(grid) and len(grid[0]) and isinstance(grid[0][0], str):
+            return BSMap.from_strgrid(grid)
+        return BSMap(np.array(grid, dtype=np.uint8))
+
+    def to_strgrid(self):
+        """GA grid for evaluate_map_fitness / BrawlStarsMap.map."""
+        return ids_to_names(self.grid.tolist())
+
     def copy(self) -> "BSMap":
         return BSMap(self.grid.copy())
 
     def to_ascii(self) -> str:
         CH = {Tile.EMPTY: " .", Tile.WALL: " #", Tile.BUSH: " ~",
-              Tile.SPAWN_A: " A", Tile.SPAWN_B: " B", Tile.POWER_ITEM: " *"}
+              Tile.SPAWN_A: " A", Tile.SPAWN_B: " B", Tile.POWER_ITEM: " *",
+              Tile.COVER: " +", Tile.WATER: " w", Tile.BOX: " b"}
         return "\n".join("".join(CH.get(int(x), " ?") for x in row) for row in self.grid)
@@ -1,16 +1,47 @@
 from enum import IntEnum
 
+# The one tile legend. The ids are what ga.py writes to best_map.txt and what
+# the Unity loader reads; BSMap grids use them directly.
 class Tile(IntEnum):
     EMPTY = 0
     WALL = 1
     BUSH = 2
-    SPAWN_A = 3
-    SPAWN_B = 4
-    POWER_ITEM = 5
+    SPAWN = 3
+    COVER = 4
+    WATER = 5
+    BOX = 6
+    SPAWN_B = 7
+    POWER_ITEM = 8
+    SPAWN_A = 3         # alias: team A spawns are plain spawns
 
 LEGEND = {t.name: int(t) for t in Tile}
 
 #maps height and width
 MAP_H, MAP_W = 60, 60
 
-MUTABLE_TILES = (Tile.EMPTY, Tile.WALL, Tile.BUSH, Tile.POWER_ITEM)
+MUTABLE_TILES = (Tile.EMPTY, Tile.WALL, Tile.BUSH, Tile.COVER, Tile.WATER, Tile.BOX, Tile.POWER_ITEM)
+
+# ---- conversion layer for the GA's list-of-strings grids
+TILE_NAMES = {
+    Tile.EMPTY: "empty",
+    Tile.WALL: "wall",
+    Tile.BUSH: "bush",
+    Tile.SPAWN: "spawn",
+    Tile.COVER: "cover",
+    Tile.WATER: "water",
+    Tile.BOX: "box",
+}
+NAME_TO_ID = {name: int(t) for t, name in TILE_NAMES.items()}
+# the GA has no teams or power items: fold them onto the nearest GA tile
+ID_TO_NAME = {**{int(t): name for t, name in TILE_NAMES.items()},
+              int(Tile.SPAWN_B): "spawn", int(Tile.POWER_ITEM): "box"}
+
+
+def names_to_ids(str_grid):
+    """GA grid (rows of tile names) -> rows of ids; unknown names become EMPTY."""
+    return [[NAME_TO_ID.get(cell, 0) for cell in row] for row in str_grid]
+
+
+def ids_to_names(id_grid):
+    """Rows of ids (lists or a numpy array) -> GA grid; unknown ids become "empty"."""
+    return [[ID_TO_NAME.get(int(x), "empty") for x in row] for row in id_grid]
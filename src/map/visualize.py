@@ -0,0 +1,152 @@
+"""
+Headless PNG previews built from the sprites in assets/.
+
+Sprites are loaded once into an atlas of equally sized RGB tiles, so a
+map renders as one fancy-indexing step (atlas[grid]) plus a reshape --
+no per-tile drawing and no matplotlib figures. render_files spreads
+maps over a process pool where every worker builds its atlas once.
+
+    from map.visualize import render_files, contact_sheet
+    render_files(["best_map.txt"], "previews")
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .tiles import Tile, names_to_ids
+
+ASSETS_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "..", "assets"))
+TILE_PX = 16
+
+# atlas index (= tile id) -> (sprite file, RGB tint). There are no cover or power
+# item sprites; they are a darkened wall and a yellow crate.
+SPRITES = {
+    Tile.EMPTY:      ("ground.png", None),
+    Tile.WALL:       ("wall.png", None),
+    Tile.BUSH:       ("greenbush.png", None),
+    Tile.SPAWN:      ("bluespawn.png", None),
+    Tile.COVER:      ("wall.png", (0.75, 0.6, 0.45)),
+    Tile.WATER:      ("water.png", None),
+    Tile.BOX:        ("crate.png", None),
+    Tile.SPAWN_B:    ("redspawn.png", None),
+    Tile.POWER_ITEM: ("crate.png", (1.0, 0.9, 0.3)),
+}
+
+
+def _load_sprite(name, tile_px, assets_dir):
+    import matplotlib.image as mpimg
+
+    img = mpimg.imread(os.path.join(assets_dir, name)).astype(np.float32)
+    if img.max() > 1.0:
+        img /= 255.0
+    if img.shape[2] == 3:
+        img = np.concatenate([img, np.ones(img.shape[:2] + (1,), np.float32)], axis=2)
+    # nearest-neighbour resize: sample tile_px rows/cols evenly
+    h, w = img.shape[:2]
+    ys = np.arange(tile_px) * h // tile_px
+    xs = np.arange(tile_px) * w // tile_px
+    return img[ys[:, None], xs[None, :]]
+
+
+def build_atlas(tile_px=TILE_PX, assets_dir=ASSETS_DIR):
+    """uint8 array (n_tiles, tile_px, tile_px, 3); sprites are composited over ground."""
+    ground = _load_sprite(SPRITES[Tile.EMPTY][0], tile_px, assets_dir)[..., :3]
+    atlas = np.zeros((len(SPRITES), tile_px, tile_px, 3), np.float32)
+    for idx, (name, tint) in SPRITES.items():
+        sprite = _load_sprite(name, tile_px, assets_dir)
+        rgb, alpha = sprite[..., :3], sprite[..., 3:]
+        if tint is not None:
+            rgb = rgb * np.asarray(tint, np.float32)
+        atlas[idx] = rgb * alpha + ground * (1 - alpha)
+    return (atlas * 255).round().astype(np.uint8)
+
+
+def to_id_grid(m, symmetry_axis="vertical"):
+    """
+    Accepts a BrawlStarsMap, a BSMap, a grid of tile names or a grid of ids.
+    Team-less spawns outside the canonical half are drawn as SPAWN_B.
+    """
+    grid = getattr(m, "map", getattr(m, "grid", m))
+    symmetry_axis = getattr(m, "symmetry_axis", symmetry_axis)
+    if len(grid) and len(grid[0]) and isinstance(grid[0][0], str):
+        grid = names_to_ids(grid)
+    ids = np.array(grid, dtype=np.uint8)
+    rows, cols = ids.shape
+    other_half = np.zeros_like(ids, dtype=bool)
+    if symmetry_axis == "horizontal":
+        other_half[rows // 2:, :] = True
+    else:
+        other_half[:, cols // 2:] = True
+    ids[(ids == Tile.SPAWN) & other_half] = Tile.SPAWN_B
+    return ids
+
+
+def render(m, atlas=None, symmetry_axis="vertical"):
+    """RGB uint8 image of shape (rows * tile_px, cols * tile_px, 3)."""
+    atlas = build_atlas() if atlas is None else atlas
+    ids = to_id_grid(m, symmetry_axis)
+    rows, cols = ids.shape
+    t = atlas.shape[1]
+    tiles = atlas[ids]                                  # (rows, cols, t, t, 3)
+    return tiles.transpose(0, 2, 1, 3, 4).reshape(rows * t, cols * t, 3)
+
+
+def save_png(img, path):
+    import matplotlib.image as mpimg
+    mpimg.imsave(path, img)
+
+
+def contact_sheet(images, columns=8, pad=4, scale=1, background=32):
+    """Tile equally sized previews into one image; scale > 1 shrinks each by striding."""
+    images = [img[::scale, ::scale] for img in images]
+    h, w = images[0].shape[:2]
+    rows = -(-len(images) // columns)
+    sheet = np.full((rows * (h + pad) + pad, columns * (w + pad) + pad, 3), background, np.uint8)
+    for i, img in enumerate(images):
+        r, c = divmod(i, columns)
+        y, x = pad + r * (h + pad), pad + c * (w + pad)
+        sheet[y:y + h, x:x + w] = img
+    return sheet
+
+
+def load_txt(path):
+    return np.loadtxt(path, dtype=np.uint8, ndmin=2)
+
+
+# ---- batch rendering in a process pool
+_worker_atlas = None
+
+
+def _init_worker(tile_px, assets_dir):
+    global _worker_atlas
+    _worker_atlas = build_atlas(tile_px, assets_dir)
+
+
+def _render_file(path, out_dir, symmetry_axis):
+    img = render(load_txt(path), _worker_atlas, symmetry_axis)
+    out = os.path.join(out_dir, os.path.splitext(os.path.basename(path))[0] + ".png")
+    save_png(img, out)
+    return out
+
+
+def render_files(paths, out_dir, workers=None, tile_px=TILE_PX, symmetry_axis="vertical",
+                 assets_dir=ASSETS_DIR):
+    """Render Unity TXT maps to <out_dir>/<name>.png; returns the written paths."""
+    os.makedirs(out_dir, exist_ok=True)
+    if workers == 1:
+        _init_worker(tile_px, assets_dir)
+        return [_render_file(p, out_dir, symmetry_axis) for p in paths]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(tile_px, assets_dir)) as pool:
+        return list(pool.map(_render_file, paths, [out_dir] * len(paths),
+                             [symmetry_axis] * len(paths), chunksize=8))
+
+
+def render_contact_sheet(paths, out_path, columns=8, tile_px=4, symmetry_axis="vertical",
+                         assets_dir=ASSETS_DIR):
+    """One PNG with a small preview of every TXT map, in order."""
+    atlas = build_atlas(tile_px, assets_dir)
+    images = [render(load_txt(p), atlas, symmetry_axis) for p in paths]
+    save_png(contact_sheet(images, columns=columns), out_path)
+    return out_path
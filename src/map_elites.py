@@ -0,0 +1,186 @@
+"""
+MAP-Elites: a pool of varied good maps instead of one winner.
+
+Every map is placed in a cell of a grid over cheap descriptors and the
+archive keeps the fittest map per cell. New maps are bred from random
+elites, so the search spreads over every niche it has found.
+
+Descriptors come from one tile_counts() histogram plus one union-find
+pass over the walls:
+
+    obstacle_density   walls + cover per tile
+    bush_density       bushes per tile
+    water_share        water per tile
+    wall_clusters      number of 4-connected wall groups
+
+    archive = run_map_elites(iterations=2000, seed=1)
+    archive.save_dir("elites")          # one TXT per cell + index.json
+"""
+import random
+import time
+
+import ga
+import profiling
+from fitness import evaluate_map_fitness, tile_counts, WALL, COVER, BUSH, WATER
+
+# (name, low, high, bins); values outside [low, high) go to the end bins
+DESCRIPTORS = (
+    ("obstacle_density", 0.0, 0.15, 6),
+    ("bush_density", 0.0, 0.06, 4),
+    ("water_share", 0.0, 0.32, 8),
+    ("wall_clusters", 0, 12, 6),
+)
+
+
+def wall_cluster_count(game_map):
+    """4-connected WALL groups, by union-find over one row-major scan."""
+    cols = len(game_map[0])
+    parent = {}
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    groups = 0
+    prev = None
+    for y, row in enumerate(game_map):
+        for x, tile in enumerate(row):
+            if tile != WALL:
+                continue
+            i = y * cols + x
+            parent[i] = i
+            groups += 1
+            for j in ((i - 1) if x and row[x - 1] == WALL else None,
+                      (i - cols) if prev is not None and prev[x] == WALL else None):
+                if j is not None:
+                    a, b = find(i), find(j)
+                    if a != b:
+                        parent[a] = b
+                        groups -= 1
+        prev = row
+    return groups
+
+
+def describe(game_map, counts=None):
+    """Descriptor values of game_map, in DESCRIPTORS order."""
+    counts = tile_counts(game_map) if counts is None else counts
+    area = len(game_map) * len(game_map[0])
+    return ((counts[WALL] + counts[COVER]) / area, counts[BUSH] / area, counts[WATER] / area,
+            wall_cluster_count(game_map))
+
+
+def cell_of(values):
+    """Archive cell (tuple of bin indices) for descriptor values."""
+    cell = []
+    for value, (_, low, high, bins) in zip(values, DESCRIPTORS):
+        b = int((value - low) / (high - low) * bins)
+        cell.append(min(bins - 1, max(0, b)))
+    return tuple(cell)
+
+
+class Archive:
+    """Best map per descriptor cell; insertion is one dict lookup."""
+
+    def __init__(self):
+        self.elites = {}                # cell -> BrawlStarsMap (with .fitness, .descriptors)
+        self.insertions = 0
+        self.attempts = 0
+
+    def __len__(self):
+        return len(self.elites)
+
+    @property
+    def size(self):
+        total = 1
+        for *_, bins in DESCRIPTORS:
+            total *= bins
+        return total
+
+    def add(self, ind):
+        """Insert ind if its cell is empty or it beats the current elite; True if kept."""
+        self.attempts += 1
+        if not ind.fitness:
+            return False
+        cell = cell_of(ind.descriptors)
+        current = self.elites.get(cell)
+        if current is not None and current.fitness >= ind.fitness:
+            return False
+        self.elites[cell] = ind
+        self.insertions += 1
+        return True
+
+    def sample(self, rng):
+        return rng.choice(list(self.elites.values()))
+
+    def best(self):
+        return max(self.elites.values(), key=lambda ind: ind.fitness)
+
+    def coverage(self):
+        return len(self.elites) / self.size
+
+    def qd_score(self):
+        """Sum of elite fitness, the usual quality-diversity summary."""
+        return sum(ind.fitness for ind in self.elites.values())
+
+    def save_dir(self, path):
+        """Write every elite as Unity TXT plus an index.json of cells, descriptors and fitness."""
+        import json
+        import os
+
+        os.makedirs(path, exist_ok=True)
+        index = []
+        for cell, ind in sorted(self.elites.items(), key=lambda kv: -kv[1].fitness):
+            name = "elite_" + "_".join(map(str, cell)) + ".txt"
+            ga.save_map_txt_strgrid(ind.map, os.path.join(path, name))
+            index.append({"file": name, "cell": cell, "fitness": ind.fitness,
+                          "descriptors": dict(zip((d[0] for d in DESCRIPTORS), ind.descriptors))})
+        with open(os.path.join(path, "index.json"), "w") as f:
+            json.dump(index, f, indent=1)
+        return index
+
+
+def _evaluate(ind):
+    counts = tile_counts(ind.map)
+    ind.fitness = evaluate_map_fitness(ind.map)
+    ind.descriptors = describe(ind.map, counts)
+    return ind
+
+
+def run_map_elites(iterations=1000, initial=50, seed=None, time_budget=None, mutation_rate=0.99,
+                   max_child_tries=5, size=None, symmetry_axis=None, profile=None, verbose=True,
+                   report_every=100, archive=None):
+    """
+    Seed the archive with `initial` random maps, then breed `iterations`
+    children from pairs of random elites. Returns the Archive (pass one
+    in to continue a run).
+    """
+    rng = random.Random(seed)
+    archive = Archive() if archive is None else archive
+    map_kwargs = dict(size=size, symmetry_axis=symmetry_axis, profile=profile)
+    deadline = None if time_budget is None else time.monotonic() + time_budget
+
+    with profiling.phase("initialization"):
+        for _ in range(initial):
+            archive.add(_evaluate(ga.BrawlStarsMap.random_map(rng=rng, **map_kwargs)))
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+
+    for it in range(iterations):
+        if deadline is not None and time.monotonic() >= deadline:
+            break
+        if len(archive) < 2:
+            child = ga.BrawlStarsMap.random_map(rng=rng, **map_kwargs)
+        else:
+            for _ in range(max_child_tries):
+                child = archive.sample(rng).crossover(archive.sample(rng), rng)
+                if rng.random() < mutation_rate:
+                    child.mutate(rng)
+                if child.feasible_or_repair(rng):
+                    break
+        archive.add(_evaluate(child))
+        if verbose and (it + 1) % report_every == 0:
+            print(f"Iteration {it + 1}: {len(archive)} elites, coverage {archive.coverage():.1%}, "
+                  f"best {archive.best().fitness:.0f}")
+    return archive
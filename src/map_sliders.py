@@ -19,4 +19,101 @@ MAX_BOXES = 60
 
 MAP_SIZE = 60
 if MAP_SIZE%2 != 0:
-    raise ValueError("Map Size must be even")
\ No newline at end of file
+    raise ValueError("Map Size must be even")
+import symmetry
+from dataclasses import dataclass, asdict, fields, replace
+from typing import get_args
+
+
+def _is_a(value, kind):
+    # bool is an int, but never a slider value; an int is a fine float
+    if kind is type(None):
+        return value is None
+    if isinstance(value, bool):
+        return False
+    return isinstance(value, (int, float) if kind is float else kind)
+
+
+@dataclass(frozen=True)
+class GenerationProfile:
+    """
+    One map style: every slider above as a field, so a single process can
+    generate different styles side by side. Defaults are the module constants.
+    """
+    map_size: int = MAP_SIZE
+    symmetry_axis: str = "vertical"
+    clearance: int = DEFAULT_CLEARANCE
+    corridor_width: int = CORRIDOR_WIDTH
+    min_spawn_dist: float | None = None     # None => map_size / 5
+    structure_scale: float = 1.0            # multiplies the 60x60 structure dimensions
+    min_water_line: int = MIN_WATER_LINE
+    max_water_line: int = MAX_WATER_LINE
+    min_wall_blocks: int = MIN_WALL_BLOCKS
+    max_wall_blocks: int = MAX_WALL_BLOCKS
+    min_cover_clusters: int = MIN_COVER_CLUSTERS
+    max_cover_clusters: int = MAX_COVER_CLUSTERS
+    min_bush_patches: int = MIN_BUSH_PATCHES
+    max_bush_patches: int = MAX_BUSH_PATCHES
+    min_boxes: int = MIN_BOXES
+    max_boxes: int = MAX_BOXES
+
+    def __post_init__(self):
+        for f in fields(self):
+            value = getattr(self, f.name)
+            if not any(_is_a(value, kind) for kind in get_args(f.type) or (f.type,)):
+                raise TypeError(f"{f.name} must be {getattr(f.type, '__name__', f.type)}, got {value!r}")
+        if self.map_size % 2 != 0:
+            raise ValueError("Map Size must be even")
+        symmetry.check_axis(self.symmetry_axis)
+        for f in fields(self):
+            if f.name.startswith("min_") and f.name != "min_spawn_dist":
+                high = getattr(self, "max_" + f.name[4:])
+                if getattr(self, f.name) > high:
+                    raise ValueError(f"{f.name} is larger than max_{f.name[4:]}")
+
+    @classmethod
+    def for_size(cls, map_size, base=None):
+        """
+        Scale a profile (default: the sliders above, tuned for MAP_SIZE) to another
+        map size while keeping obstacle density: structure counts grow with the
+        side length and structure dimensions with its square root, so covered
+        area grows with the map area.
+        """
+        base = base or cls()
+        linear = map_size / base.map_size
+        scaled = {"map_size": map_size, "structure_scale": base.structure_scale * linear ** 0.5}
+        for f in fields(cls):
+            if f.name.startswith(("min_", "max_")) and f.name != "min_spawn_dist":
+                scaled[f.name] = max(1, round(getattr(base, f.name) * linear))
+        return replace(base, **scaled)
+
+    @property
+    def spawn_dist(self):
+        return self.map_size / 5 if self.min_spawn_dist is None else self.min_spawn_dist
+
+    def with_overrides(self, **overrides):
+        return replace(self, **overrides)
+
+    def to_dict(self):
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data):
+        unknown = set(data) - {f.name for f in fields(cls)}
+        if unknown:
+            raise ValueError(f"unknown profile fields: {sorted(unknown)}")
+        return cls(**data)
+
+    @classmethod
+    def from_file(cls, path):
+        import json
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    def save(self, path):
+        import json
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+DEFAULT_PROFILE = GenerationProfile()
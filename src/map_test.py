@@ -1,10 +1,11 @@
 import numpy as np
-import matplotlib.pyplot as plt
 from map.map_repr import BSMap
 from map.io_fmt import save_map_json
 from map.io_fmt import save_map_txt
 
 if __name__ == "__main__":
+    import matplotlib.pyplot as plt                 # only needed for the preview window
+
     np.random.seed(123)
     m = BSMap.random()
 
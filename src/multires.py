@@ -0,0 +1,263 @@
+"""
+Coarse-to-fine evolution: search a block layout first, then the tiles.
+
+A coarse map has one tile per block x block square of the real map, so a
+60x60 arena is a 15x15 layout at block=4 and evaluating it is ~16x
+cheaper. CoarseMap is a BrawlStarsMap, so run_ga, crossover, spawn and
+box repair, symmetry and connectivity all work on it unchanged; only
+the operators that stamp structures are replaced by block painting.
+
+    1. random full-size maps, downsampled (each block takes its most
+       common structure), seed the coarse population
+    2. run_ga evolves the layouts for most of the budget
+    3. the best layout is upsampled by stamping every block (water fills
+       it, walls too but cut into clusters no bigger than the generator's
+       own wall blocks, cover and bushes are scattered, boxes and spawns
+       go in the middle) and a short run_ga refines the tiles
+
+    best = run_multires(time_budget=10, seed=1)
+"""
+import math
+import random
+import time
+from collections import Counter, deque
+
+import ga
+import profiling
+from fitness import WALKABLE, WALL, WATER, COVER, BOX, SPAWN, BUSH, HARD_CONSTRAINTS, box_count_range, tile_counts
+from map_sliders import DEFAULT_PROFILE, GenerationProfile
+
+SCATTER = 0.7                       # fill rate of cover and bush blocks, like the blob stamps
+
+
+def has_box_blocks(game_map, counts):
+    return counts[BOX] > 0
+
+
+class CoarseMap(ga.BrawlStarsMap):
+    """A block layout evolved with the GA operators; one tile stands for one block."""
+
+    # a layout is far smaller (and may be odd-sized) than any real arena, and
+    # upsample() sets the real box count, so it only needs some box blocks
+    hard_constraints = [c for c in HARD_CONSTRAINTS if c[0] not in ("valid_size", "valid_box_count")]
+    hard_constraints.append(("has_box_blocks", has_box_blocks))
+
+    def _repair_boxes(self):
+        pass
+
+    def _place_structures_half(self, rng):
+        p = self.profile
+        for tile, count in ((WATER, rng.randint(p.min_water_line, p.max_water_line)),
+                            (WALL, rng.randint(p.min_wall_blocks, p.max_wall_blocks)),
+                            (COVER, rng.randint(p.min_cover_clusters, p.max_cover_clusters)),
+                            (BOX, rng.randint(p.min_boxes, p.max_boxes)),
+                            (BUSH, rng.randint(p.min_bush_patches, p.max_bush_patches))):
+            for _ in range(count):
+                self._paint_blocks(rng, tile)
+
+    def _paint_blocks(self, rng, tile, max_side=3):
+        # a w x h patch of the canonical half, keeping spawns
+        y0, y1, x0, x1 = self._half_bounds()
+        w, h = rng.randint(1, max_side), rng.randint(1, max_side)
+        x = rng.randint(x0, max(x0, x1 - w + 1))
+        y = rng.randint(y0, max(y0, y1 - h + 1))
+        for row in self.map[y:y + h]:
+            row[x:x + w] = [t if t == SPAWN else tile for t in row[x:x + w]]
+
+    @profiling.timed("mutation")
+    def mutate(self, rng):
+        # same operator mix as BrawlStarsMap.mutate, in blocks
+        op = rng.choices(["add_element", "remove_area", "bush_patch"], weights=[0.50, 0.30, 0.20], k=1)[0]
+        if op == "add_element":
+            tile = rng.choices([WATER, WALL, COVER, BOX], weights=[0.25, 0.30, 0.25, 0.20], k=1)[0]
+            self._paint_blocks(rng, tile, max_side=1 if tile == BOX else 2)
+        elif op == "remove_area":
+            self._paint_blocks(rng, WALKABLE)
+        else:
+            self._paint_blocks(rng, BUSH, max_side=2)
+        self._reimpose_symmetry()
+        self._ensure_spawn_connectivity()
+
+
+def coarse_shape(rows, cols, block):
+    return max(1, rows // block), max(1, cols // block)
+
+
+def _bounds(i, coarse, fine):
+    # fine index range covered by coarse index i; works when block does not divide the size
+    return i * fine // coarse, (i + 1) * fine // coarse
+
+
+def downsample(grid, shape):
+    """
+    Block layout of grid. A block holding a spawn is SPAWN; otherwise its
+    most common structure if that covers at least a quarter of the block,
+    so sparse ones (boxes, thin water lines) survive, else WALKABLE.
+    """
+    rows, cols = len(grid), len(grid[0])
+    cr, cc = shape
+    out = []
+    for by in range(cr):
+        y0, y1 = _bounds(by, cr, rows)
+        block_rows = grid[y0:y1]
+        row = []
+        for bx in range(cc):
+            x0, x1 = _bounds(bx, cc, cols)
+            counts = Counter(t for r in block_rows for t in r[x0:x1])
+            if counts[SPAWN]:
+                row.append(SPAWN)
+                continue
+            area = sum(counts.values())
+            counts.pop(WALKABLE, None)
+            structure = counts.most_common(1)
+            row.append(structure[0][0] if structure and structure[0][1] * 4 >= area else WALKABLE)
+        out.append(row)
+    return out
+
+
+def _box_clump(rows, x0, x1, n):
+    # n boxes as a near-square clump in the middle of the block
+    w = min(x1 - x0, math.ceil(math.sqrt(n)))
+    h = min(len(rows), math.ceil(n / w))
+    top, left = (len(rows) - h) // 2, x0 + (x1 - x0 - w) // 2
+    for k in range(min(n, w * h)):
+        rows[top + k // w][left + k % w] = BOX
+
+
+def wall_pieces(grid, max_blocks):
+    """
+    {(bx, by): piece} for every WALL block: each wall cluster of the layout
+    is cut, in breadth-first order, into pieces of at most max_blocks
+    blocks.
+    """
+    rows, cols = len(grid), len(grid[0])
+    piece = {}
+    n = size = 0
+
+    def claim(x, y):
+        # in visiting order, so each piece is a compact part of its cluster
+        nonlocal n, size
+        if size == max_blocks:
+            n, size = n + 1, 0
+        piece[(x, y)] = n
+        size += 1
+
+    for by, row in enumerate(grid):
+        for bx, tile in enumerate(row):
+            if tile != WALL or (bx, by) in piece:
+                continue
+            n, size = n + 1, 0                  # a new cluster starts a new piece
+            claim(bx, by)
+            queue = deque([(bx, by)])
+            while queue:
+                x, y = queue.popleft()
+                for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                    if 0 <= nx < cols and 0 <= ny < rows and grid[ny][nx] == WALL and (nx, ny) not in piece:
+                        claim(nx, ny)
+                        queue.append((nx, ny))
+    return piece
+
+
+def upsample(coarse, rng, size=None, profile=None):
+    """
+    Full-size BrawlStarsMap stamped from a coarse layout, then made
+    symmetric, connected and (where cheaply possible) feasible. Box blocks
+    share the middle of the full-size box range between them. Solid wall
+    blocks would merge into clusters far bigger than any the generator
+    stamps (and wall_cluster_score grows with size ** 2.7), so a wall
+    cluster is cut into pieces of at most the biggest wall rectangle of
+    the fine profile, with a one-tile seam between pieces.
+    """
+    fine = ga.BrawlStarsMap(size=size, symmetry_axis=coarse.symmetry_axis, profile=profile)
+    cr, cc = coarse.rows, coarse.cols
+    box_blocks = tile_counts(coarse.map)[BOX]
+    low, high = box_count_range(fine.rows, fine.cols)
+    per_box_block = math.ceil((low + high) / 2 / box_blocks) if box_blocks else 0
+    block_area = (fine.rows // cr) * (fine.cols // cc)
+    piece = wall_pieces(coarse.map, max(1, fine._dim(10) ** 2 // block_area))
+    for by, coarse_row in enumerate(coarse.map):
+        y0, y1 = _bounds(by, cr, fine.rows)
+        for bx, tile in enumerate(coarse_row):
+            if tile == WALKABLE:
+                continue
+            x0, x1 = _bounds(bx, cc, fine.cols)
+            if tile == SPAWN:
+                fine.map[(y0 + y1 - 1) // 2][(x0 + x1 - 1) // 2] = SPAWN
+            elif tile == BOX:
+                _box_clump(fine.map[y0:y1], x0, x1, per_box_block)
+            else:
+                for row in fine.map[y0:y1]:
+                    if tile in (COVER, BUSH):
+                        row[x0:x1] = [tile if rng.random() < SCATTER else t for t in row[x0:x1]]
+                    else:
+                        row[x0:x1] = [tile] * (x1 - x0)
+                if tile == WALL:
+                    # seam on the right / bottom edge towards another piece
+                    own = piece[(bx, by)]
+                    if piece.get((bx + 1, by), own) != own:
+                        for row in fine.map[y0:y1]:
+                            row[x1 - 1] = WALKABLE
+                    if piece.get((bx, by + 1), own) != own:
+                        fine.map[y1 - 1][x0:x1] = [WALKABLE] * (x1 - x0)
+    fine._apply_symmetry()
+    fine._ensure_spawn_connectivity()
+    fine._repair_boxes()
+    fine.feasible_or_repair(rng)
+    return fine
+
+
+def coarse_profile(profile, block):
+    """profile scaled to the coarse layout (for_size wants an even side, so odd sides round up)."""
+    side = max(1, profile.map_size // block)
+    return GenerationProfile.for_size(side + side % 2, profile)
+
+
+def run_multires(block=4, coarse_population=40, coarse_generations=60, fine_population=20,
+                 fine_generations=10, seed=None, time_budget=None, coarse_share=0.75, size=None,
+                 symmetry_axis=None, profile=None, verbose=True, **fine_kwargs):
+    """
+    Evolve a block layout with run_ga, upsample the best one into
+    fine_population full-size maps (one as is, the rest mutated once) and
+    refine them with a short run_ga. time_budget is split coarse_share /
+    1 - coarse_share between the two runs. Extra keyword arguments go to
+    the fine run_ga. The returned map has .coarse, the layout it grew from.
+    """
+    rng = random.Random(seed)
+    profile = profile or DEFAULT_PROFILE
+    if symmetry_axis:
+        profile = profile.with_overrides(symmetry_axis=symmetry_axis)
+    size = size or (profile.map_size, profile.map_size)
+    shape = coarse_shape(*size, block)
+    small = coarse_profile(profile, block)
+    start = time.monotonic()
+
+    with profiling.phase("initialization"):
+        layouts = []
+        for _ in range(coarse_population):
+            fine = ga.BrawlStarsMap.random_map(rng=rng, size=size, profile=profile)
+            layout = CoarseMap(size=shape, profile=small)
+            layout.map = downsample(fine.map, shape)
+            layout._apply_symmetry()            # most_common breaks ties by scan order
+            layout.feasible_or_repair(rng)
+            layouts.append(layout)
+
+    coarse_budget = None if time_budget is None else max(0.0, time_budget * coarse_share - (time.monotonic() - start))
+    best_layout = ga.run_ga(population_size=coarse_population, generations=coarse_generations, seed=rng.randrange(2 ** 32),
+                            time_budget=coarse_budget, initial_population=layouts, verbose=verbose)
+    if verbose:
+        print(f"Coarse {shape[0]}x{shape[1]} layout: fitness {best_layout.fitness:.0f}, "
+              f"tiles {dict(tile_counts(best_layout.map))}")
+
+    population = []
+    for k in range(fine_population):
+        fine = upsample(best_layout, rng, size=size, profile=profile)
+        if k:
+            fine.mutate(rng)
+            fine.feasible_or_repair(rng)
+        population.append(fine)
+    fine_budget = None if time_budget is None else max(0.0, time_budget - (time.monotonic() - start))
+    best = ga.run_ga(population_size=fine_population, generations=fine_generations, seed=rng.randrange(2 ** 32),
+                     time_budget=fine_budget, initial_population=population, size=size, profile=profile,
+                     verbose=verbose, **fine_kwargs)
+    best.coarse = best_layout
+    return best
@@ -0,0 +1,188 @@
+"""
+Multi-objective mode (NSGA-II): every soft fitness term is its own
+objective, so wall_cluster_score can no longer drown out the rest of the
+weighted sum. The result is a Pareto front of trade-offs, not one map.
+
+Non-dominated sorting uses Python ints as bitsets over the population.
+For each objective, one pass down the sorted scores builds "everyone at
+least as good as i" as a running OR; AND-ing those over the objectives
+gives the set of maps dominating i in a handful of big-int operations,
+which run in C. Peeling fronts is then a mask test per map, instead of
+the O(M * N^2) pairwise comparisons of the textbook algorithm.
+
+    front = run_nsga2(population_size=200, generations=50, seed=1)
+    save_front(front, "pareto")
+"""
+import random
+import time
+
+import ga
+from fitness import evaluate_map_fitness, SOFT_TERMS
+
+OBJECTIVES = tuple(name for name, _ in SOFT_TERMS)
+INFEASIBLE = float("-inf")
+
+
+def objective_vector(game_map, objectives=OBJECTIVES):
+    """Soft term scores in objectives order (all maximised); -inf everywhere if a hard constraint fails."""
+    _, parts = evaluate_map_fitness(game_map, breakdown=True)
+    return tuple(parts.get(name, INFEASIBLE) for name in objectives)
+
+
+def _at_least_as_good(values):
+    """Per index i: (bitset of j with values[j] >= values[i], bitset of j with values[j] == values[i])."""
+    n = len(values)
+    order = sorted(range(n), key=values.__getitem__, reverse=True)
+    geq = [0] * n
+    eq = [0] * n
+    running = 0
+    k = 0
+    while k < n:
+        # one group of tied values
+        v = values[order[k]]
+        group = 0
+        end = k
+        while end < n and values[order[end]] == v:
+            group |= 1 << order[end]
+            end += 1
+        running |= group
+        for idx in order[k:end]:
+            geq[idx] = running
+            eq[idx] = group
+        k = end
+    return geq, eq
+
+
+def non_dominated_sort(scores):
+    """
+    Fronts of score vectors (lists of indices, best front first), where j
+    dominates i if it is >= in every objective and > in at least one.
+    """
+    n = len(scores)
+    if n == 0:
+        return []
+    dominators = [-1] * n           # all bits set
+    equal = [-1] * n
+    for m in range(len(scores[0])):
+        geq, eq = _at_least_as_good([s[m] for s in scores])
+        for i in range(n):
+            dominators[i] &= geq[i]
+            equal[i] &= eq[i]
+    dominators = [d & ~e for d, e in zip(dominators, equal)]
+
+    fronts = []
+    remaining = set(range(n))
+    remaining_mask = (1 << n) - 1
+    while remaining:
+        front = [i for i in remaining if not dominators[i] & remaining_mask]
+        for i in front:
+            remaining_mask &= ~(1 << i)
+        remaining.difference_update(front)
+        fronts.append(sorted(front))
+    return fronts
+
+
+def crowding_distance(scores, front):
+    """{index: crowding distance} within one front; boundary maps get inf."""
+    dist = {i: 0.0 for i in front}
+    if len(front) <= 2:
+        return {i: float("inf") for i in front}
+    for m in range(len(scores[front[0]])):
+        ordered = sorted(front, key=lambda i: scores[i][m])
+        lo, hi = scores[ordered[0]][m], scores[ordered[-1]][m]
+        dist[ordered[0]] = dist[ordered[-1]] = float("inf")
+        if hi == lo or lo == INFEASIBLE:
+            continue
+        span = hi - lo
+        for prev, cur, nxt in zip(ordered, ordered[1:], ordered[2:]):
+            dist[cur] += (scores[nxt][m] - scores[prev][m]) / span
+    return dist
+
+
+def rank_population(scores):
+    """(rank, crowding) per index: rank is the front number, crowding breaks ties inside it."""
+    rank = [0] * len(scores)
+    crowd = [0.0] * len(scores)
+    for r, front in enumerate(non_dominated_sort(scores)):
+        for i, d in crowding_distance(scores, front).items():
+            rank[i] = r
+            crowd[i] = d
+    return rank, crowd
+
+
+def _better(i, j, rank, crowd):
+    return i if (rank[i], -crowd[i]) < (rank[j], -crowd[j]) else j
+
+
+def run_nsga2(population_size=100, generations=50, seed=None, objectives=OBJECTIVES, time_budget=None,
+              mutation_rate=0.99, max_child_tries=5, size=None, symmetry_axis=None, profile=None,
+              verbose=True):
+    """
+    NSGA-II over the soft fitness terms. Each generation breeds
+    population_size children (binary tournaments on rank, then crowding),
+    and the best population_size of parents + children survive. Returns
+    the first front of the final population, each map with .objectives
+    (a tuple in objectives order) and .fitness (the weighted sum).
+    """
+    rng = random.Random(seed)
+    map_kwargs = dict(size=size, symmetry_axis=symmetry_axis, profile=profile)
+    deadline = None if time_budget is None else time.monotonic() + time_budget
+
+    def evaluate(ind):
+        ind.objectives = objective_vector(ind.map, objectives)
+        ind.fitness = sum(v for v in ind.objectives if v != INFEASIBLE)
+        return ind
+
+    population = [evaluate(ga.BrawlStarsMap.random_map(rng=rng, **map_kwargs)) for _ in range(population_size)]
+    rank, crowd = rank_population([ind.objectives for ind in population])
+
+    for gen in range(generations):
+        if deadline is not None and time.monotonic() >= deadline:
+            break
+        children = []
+        while len(children) < population_size:
+            for _ in range(max_child_tries):
+                a = _better(*rng.sample(range(len(population)), 2), rank, crowd)
+                b = _better(*rng.sample(range(len(population)), 2), rank, crowd)
+                child = population[a].crossover(population[b], rng)
+                if rng.random() < mutation_rate:
+                    child.mutate(rng)
+                if child.feasible_or_repair(rng):
+                    break
+            children.append(evaluate(child))
+
+        combined = population + children
+        scores = [ind.objectives for ind in combined]
+        survivors = []
+        for front in non_dominated_sort(scores):
+            if len(survivors) + len(front) <= population_size:
+                survivors.extend(front)
+                continue
+            crowding = crowding_distance(scores, front)
+            front.sort(key=lambda i: crowding[i], reverse=True)
+            survivors.extend(front[:population_size - len(survivors)])
+            break
+        population = [combined[i] for i in survivors]
+        rank, crowd = rank_population([ind.objectives for ind in population])
+        if verbose:
+            print(f"Generation {gen}: front size {rank.count(0)}, "
+                  f"best weighted sum {max(ind.fitness for ind in population):.0f}")
+
+    return [ind for ind, r in zip(population, rank) if r == 0]
+
+
+def save_front(front, path, objectives=OBJECTIVES):
+    """Write each Pareto map as Unity TXT plus an index.json of its objectives."""
+    import json
+    import os
+
+    os.makedirs(path, exist_ok=True)
+    index = []
+    for k, ind in enumerate(sorted(front, key=lambda ind: -ind.fitness)):
+        name = f"pareto_{k:03d}.txt"
+        ga.save_map_txt_strgrid(ind.map, os.path.join(path, name))
+        index.append({"file": name, "fitness": ind.fitness,
+                      "objectives": dict(zip(objectives, ind.objectives))})
+    with open(os.path.join(path, "index.json"), "w") as f:
+        json.dump(index, f, indent=1)
+    return index
@@ -0,0 +1,183 @@
+import functools
+import time
+from contextlib import contextmanager
+
+# cProfile, pstats and json are imported where used: profiling is imported by
+# fitness/ga on every start-up and most runs never record anything.
+
+# Phases run_ga reports on. Times are exclusive: a connectivity repair that
+# happens inside crossover is billed to connectivity_repair, not crossover.
+PHASES = (
+    "initialization", "evaluation", "selection", "crossover",
+    "mutation", "connectivity_repair", "spawn_repair",
+)
+
+_active = None      # recorder currently collecting, if any
+
+
+class GARecorder:
+    """
+    Collects per-phase times, per-fitness-term times and event counters
+    for a GA run and writes one JSON line per generation.
+    """
+
+    def __init__(self, log_path=None, profile_path=None, echo=False):
+        self.log_path = log_path
+        self.profile_path = profile_path
+        self.echo = echo                    # also print each record
+        self.records = []
+        self.phase_times = {}
+        self.term_times = {}
+        self.counters = {}
+        self._stack = []                    # [name, start, child_time]
+        self._file = None
+        self._profiler = None
+        if profile_path:
+            import cProfile
+            self._profiler = cProfile.Profile()
+        self._run_start = None
+        self._gen_start = None
+
+    # ---- lifecycle
+    def start(self):
+        global _active
+        self._run_start = self._gen_start = time.perf_counter()
+        if self.log_path:
+            self._file = open(self.log_path, "w", newline="\n")
+        if self._profiler:
+            self._profiler.enable()
+        _active = self
+
+    def stop(self):
+        global _active
+        if self._profiler:
+            self._profiler.disable()
+            self._profiler.dump_stats(self.profile_path)
+        if self._file:
+            self._file.close()
+            self._file = None
+        if _active is self:
+            _active = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    # ---- collection
+    def push(self, name):
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def pop(self):
+        name, start, child = self._stack.pop()
+        elapsed = time.perf_counter() - start
+        self.phase_times[name] = self.phase_times.get(name, 0.0) + elapsed - child
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+    def add_term_time(self, name, seconds):
+        self.term_times[name] = self.term_times.get(name, 0.0) + seconds
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def end_generation(self, gen, **fields):
+        """Emit a record for everything collected since the previous one and reset."""
+        now = time.perf_counter()
+        record = {
+            "gen": gen,
+            "gen_time": now - self._gen_start,
+            "elapsed": now - self._run_start,
+            **fields,
+            "phases": {k: round(v, 6) for k, v in self.phase_times.items()},
+            "terms": {k: round(v, 6) for k, v in self.term_times.items()},
+            "counters": dict(self.counters),
+        }
+        self.records.append(record)
+        import json
+        line = json.dumps(record)
+        if self._file:
+            self._file.write(line + "\n")
+            self._file.flush()
+        if self.echo:
+            print(line)
+        self.phase_times = {}
+        self.term_times = {}
+        self.counters = {}
+        self._gen_start = now
+        return record
+
+    def top_functions(self, n=20, sort="cumulative"):
+        """Print the hottest functions from the cProfile dump."""
+        if not self.profile_path:
+            return
+        import pstats
+        pstats.Stats(self.profile_path).sort_stats(sort).print_stats(n)
+
+
+# ---- module-level hooks; no-ops unless a recorder is active
+@contextmanager
+def phase(name):
+    rec = _active
+    if rec is None:
+        yield
+        return
+    rec.push(name)
+    try:
+        yield
+    finally:
+        rec.pop()
+
+
+def timed(name):
+    """Decorator form of phase() for methods that are a phase in full."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            rec = _active
+            if rec is None:
+                return fn(*args, **kwargs)
+            rec.push(name)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                rec.pop()
+        return inner
+    return wrap
+
+
+def add_term_time(name, seconds):
+    if _active is not None:
+        _active.add_term_time(name, seconds)
+
+
+def count(name, n=1):
+    if _active is not None:
+        _active.count(name, n)
+
+
+def summarize_breakdowns(breakdowns):
+    """
+    Collapse per-individual fitness breakdowns into one dict: pass rate for
+    each hard constraint, mean for each soft term (over feasible maps only).
+    """
+    breakdowns = [b for b in breakdowns if b]
+    if not breakdowns:
+        return {}
+    summary = {}
+    for key in breakdowns[0]:
+        if isinstance(breakdowns[0][key], bool):
+            summary[key + "_rate"] = sum(b.get(key, False) for b in breakdowns) / len(breakdowns)
+    feasible = [b for b in breakdowns if b["total"] > 0] or breakdowns
+    keys = {k for b in feasible for k, v in b.items() if not isinstance(v, bool)}
+    for key in sorted(keys):
+        values = [b[key] for b in feasible if key in b]
+        summary[key + "_mean"] = sum(values) / len(values)
+    return summary
+
+
+def active():
+    return _active
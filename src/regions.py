@@ -0,0 +1,214 @@
+"""
+Region-decomposed evolution for very large maps.
+
+One individual of a big arena is too slow to evaluate for a GA to make
+progress, so the canonical half is cut into regions of about the size
+the generator is tuned for, and every region is evolved by its own
+run_ga in a worker process. Generation time then scales with the number
+of cores instead of the arena area.
+
+Regions must fit together without knowing their neighbours, so the
+boundary constraint is the same for all of them: the middle third of
+every side (a gate, GATE_DEPTH tiles deep) stays open and the region
+keeps its gates connected. Regions are scored on REGION_TERMS only
+(symmetry, spawns and team balance are properties of the whole map).
+
+After the regions come back they are stitched into the half, and each of
+`finishes` global passes places spawns, mirrors the half and repairs
+connectivity across the seams (BrawlStarsMap._ensure_spawn_connectivity),
+then scores the whole map with evaluate_map_fitness; the best is kept.
+
+    best = run_regions(size=(240, 240), time_budget=60, workers=8, seed=1)
+"""
+import concurrent.futures
+import copy
+import os
+import random
+import time
+
+import bitboards
+import ga
+import profiling
+import symmetry
+from fitness import (evaluate_map_fitness, tile_counts, box_count_range, WALKABLE, BOX, SPAWN,
+                     HARD_CONSTRAINTS, SOFT_TERMS)
+from map_sliders import DEFAULT_PROFILE, GenerationProfile
+
+REGION_SIDE = 60                    # the map size the structure sliders are tuned for
+GATE_DEPTH = 2
+REGION_TERMS = [t for t in SOFT_TERMS if t[0] in ("reachable_tiles_score", "wall_cluster_score")]
+
+
+class RegionMap(ga.BrawlStarsMap):
+    """One rectangle of a canonical half: no mirroring and no spawns, open gates on every side."""
+
+    hard_constraints = [c for c in HARD_CONSTRAINTS if c[0] == "valid_box_count"]
+    soft_terms = REGION_TERMS
+
+    @classmethod
+    def random_map(cls, rng, max_tries=20, **map_kwargs):
+        for _ in range(max_tries):
+            m = cls(**map_kwargs)
+            m._place_structures_half(rng)
+            m._apply_symmetry()
+            m._ensure_spawn_connectivity()
+            if m.feasible_or_repair(rng):
+                return m
+            profiling.count("random_map_retries")
+        return m
+
+    def gates(self):
+        """(x, y) of every gate tile."""
+        rows, cols = self.rows, self.cols
+        tiles = []
+        for d in range(GATE_DEPTH):
+            tiles += [(x, y) for x in range(cols // 3, cols - cols // 3) for y in (d, rows - 1 - d)]
+            tiles += [(x, y) for y in range(rows // 3, rows - rows // 3) for x in (d, cols - 1 - d)]
+        return tiles
+
+    def gate_centres(self):
+        return [(self.cols // 2, 0), (0, self.rows // 2), (self.cols - 1, self.rows // 2),
+                (self.cols // 2, self.rows - 1)]
+
+    def _half_bounds(self):
+        return (0, self.rows - 1, 0, self.cols - 1)
+
+    def _apply_symmetry(self):
+        # nothing to mirror inside a region; re-open the gates instead
+        for x, y in self.gates():
+            if self.map[y][x] in ga.OBSTACLE:
+                self.map[y][x] = WALKABLE
+
+    def _repair_spawns(self, rng):
+        pass                                # spawns are placed on the stitched map
+
+    def _repair_boxes(self):
+        # like BrawlStarsMap._repair_boxes, without mirrored pairs
+        excess = tile_counts(self.map)[BOX] - box_count_range(self.rows, self.cols)[1]
+        for row in reversed(self.map):
+            for x in range(self.cols - 1, -1, -1):
+                if excess <= 0:
+                    return
+                if row[x] == BOX:
+                    row[x] = WALKABLE
+                    excess -= 1
+
+    @profiling.timed("connectivity_repair")
+    def _ensure_spawn_connectivity(self):
+        # the base class joins the spawns; a region joins its gates
+        lay = bitboards.layout(self.rows, self.cols)
+        root, *others = self.gate_centres()
+        reachable = self._bfs_passable_from([root])
+        for gate in others:
+            if not lay.test(reachable, *gate):
+                path = self._bfs_any_cost(root, gate)
+                profiling.count("corridors_carved")
+                for (x, y) in path:
+                    if self.map[y][x] in ga.OBSTACLE:
+                        self.map[y][x] = WALKABLE
+                self._clearance_halo_along_path(path)
+                reachable = self._bfs_passable_from(path, reachable)
+
+
+def partition(rows, cols, axis, side=REGION_SIDE):
+    """(x0, y0, x1, y1) rectangles, ends exclusive, tiling the canonical half in pieces of about side x side."""
+    y0, y1, x0, x1 = symmetry.canonical_half(rows, cols, axis)
+    h, w = y1 - y0 + 1, x1 - x0 + 1
+    ny, nx = max(1, round(h / side)), max(1, round(w / side))
+    return [(x0 + i * w // nx, y0 + j * h // ny, x0 + (i + 1) * w // nx, y0 + (j + 1) * h // ny)
+            for j in range(ny) for i in range(nx)]
+
+
+def region_profile(profile, rect):
+    """profile scaled to the region (for_size wants an even side)."""
+    x0, y0, x1, y1 = rect
+    side = max(x1 - x0, y1 - y0)
+    return GenerationProfile.for_size(side + side % 2, profile)
+
+
+def _evolve_region(job):
+    # runs in a worker: evolve one region, return its best grid
+    rect, profile, seed, population_size, generations, time_budget = job
+    random.seed(seed)                       # stamping helpers use the global RNG
+    rng = random.Random(seed)
+    x0, y0, x1, y1 = rect
+    shape = (y1 - y0, x1 - x0)
+    start = time.monotonic()
+    initial = [RegionMap.random_map(rng=rng, size=shape, profile=profile) for _ in range(population_size)]
+    if time_budget is not None:
+        time_budget = max(0.0, time_budget - (time.monotonic() - start))
+    best = ga.run_ga(population_size=population_size, generations=generations, seed=rng.randrange(2 ** 32),
+                     time_budget=time_budget, initial_population=initial, verbose=False)
+    return best.map, best.fitness
+
+
+def stitch(rects, grids, size, profile):
+    """BrawlStarsMap with every region grid copied into its rectangle (the rest WALKABLE)."""
+    m = ga.BrawlStarsMap(size=size, profile=profile)
+    for (x0, y0, x1, y1), grid in zip(rects, grids):
+        for y, row in zip(range(y0, y1), grid):
+            m.map[y][x0:x1] = row
+    return m
+
+
+def finish(stitched, rng):
+    """Copy of a stitched half with spawns placed, mirrored and repaired across the seams."""
+    m = copy.deepcopy(stitched)
+    for x, y in m._generate_spawn_points(rng):
+        m.map[y][x] = SPAWN
+    m._apply_symmetry()
+    m._ensure_spawn_connectivity()
+    m._repair_boxes()
+    m.feasible_or_repair(rng)
+    return m
+
+
+def run_regions(size=None, symmetry_axis=None, profile=None, region_side=REGION_SIDE, population_size=30,
+                generations=30, time_budget=None, region_share=0.8, workers=None, finishes=5, seed=None,
+                verbose=True):
+    """
+    Evolve the regions of the canonical half in parallel, stitch them and
+    keep the best of `finishes` global passes. workers is the pool size
+    (None = CPU count, 1 = run in this process). time_budget: regions get
+    region_share of it, split over the rounds of regions each worker
+    runs; the global passes always run. The returned map has .fitness,
+    .breakdown and .regions (the rectangles).
+    """
+    rng = random.Random(seed)
+    profile = profile or DEFAULT_PROFILE
+    if symmetry_axis:
+        profile = profile.with_overrides(symmetry_axis=symmetry_axis)
+    size = size or (profile.map_size, profile.map_size)
+    rects = partition(*size, profile.symmetry_axis, region_side)
+
+    workers = workers or os.cpu_count() or 1
+    pool = None
+    if workers != 1 and len(rects) > 1:
+        pool = concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=ga._steady_worker_init)
+    rounds = -(-len(rects) // workers)
+    budget = None if time_budget is None else time_budget * region_share / rounds
+    jobs = [(rect, region_profile(profile, rect), rng.randrange(2 ** 32), population_size, generations, budget)
+            for rect in rects]
+    try:
+        with profiling.phase("regions"):
+            results = list(pool.map(_evolve_region, jobs) if pool else map(_evolve_region, jobs))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    if verbose:
+        for rect, (_, fitness) in zip(rects, results):
+            print(f"Region {rect}: fitness {fitness:.0f}")
+
+    stitched = stitch(rects, [grid for grid, _ in results], size, profile)
+    best = None
+    with profiling.phase("global_pass"):
+        for _ in range(finishes):
+            m = finish(stitched, rng)
+            m.fitness, m.breakdown = evaluate_map_fitness(m.map, breakdown=True)
+            if verbose:
+                print(f"Global pass: fitness {m.fitness:.0f}")
+            if best is None or m.fitness > best.fitness:
+                best = m
+    best.regions = rects
+    best.stop_reason = "regions"
+    return best
@@ -0,0 +1,355 @@
+"""
+Local map-generation service.
+
+Runs an asyncio HTTP server (TCP or Unix socket) in front of a process pool
+of GA workers, so many requests share a few warm interpreters instead of
+each paying for `python3 ga.py`.
+
+    POST /jobs               {"profile": "open_arena", "size": 60, "symmetry_axis": "vertical",
+                              "sliders": {"max_boxes": 40}, "seed": 1, "time_budget": 2.0}
+                             -> {"id": ...}
+    GET  /jobs/<id>          job status, fitness and stop reason
+    GET  /jobs/<id>/events   progress as JSON lines until the job finishes
+    GET  /maps/<id>          finished map in the Unity TXT format (?format=json for JSON)
+
+    python3 service.py --port 8765 --workers 4
+    python3 service.py --unix /tmp/bsmap.sock --profiles-dir profiles
+
+"profile" names a <name>.json GenerationProfile in the profiles directory;
+"sliders" overrides individual profile fields for one job. Finished jobs
+stay queryable for FINISHED_JOB_TTL seconds, and at most MAX_FINISHED_JOBS
+of them are kept.
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import multiprocessing
+import os
+import random
+import threading
+import time
+import uuid
+from urllib.parse import urlsplit, parse_qs
+
+from map_sliders import GenerationProfile, DEFAULT_PROFILE
+
+# Job fields a client may set, with defaults
+JOB_DEFAULTS = {
+    "profile": None,
+    "size": None,
+    "symmetry_axis": None,
+    "sliders": {},
+    "seed": None,
+    "time_budget": 2.0,
+    "population_size": 30,
+    "generations": None,
+}
+MAX_TIME_BUDGET = 300.0
+MAX_POPULATION = 1000
+FINISHED_JOB_TTL = 3600.0           # seconds a finished job (and its map) stays queryable
+MAX_FINISHED_JOBS = 1000
+
+
+class JobError(ValueError):
+    pass
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def parse_job(params, profiles_dir=None):
+    """Validate a job request body, fill in defaults and resolve its profile."""
+    import fitness
+
+    if not isinstance(params, dict):
+        raise JobError("job must be a JSON object")
+    unknown = set(params) - set(JOB_DEFAULTS)
+    if unknown:
+        raise JobError(f"unknown job fields: {sorted(unknown)}")
+    job = {**JOB_DEFAULTS, **params}
+
+    if not isinstance(job["sliders"], dict):
+        raise JobError("sliders must be an object")
+    budget = job["time_budget"]
+    if isinstance(budget, bool) or not isinstance(budget, (int, float)) or not 0 < budget <= MAX_TIME_BUDGET:
+        raise JobError(f"time_budget must be in (0, {MAX_TIME_BUDGET}]")
+    if not _is_int(job["population_size"]) or not 2 <= job["population_size"] <= MAX_POPULATION:
+        raise JobError(f"population_size must be an integer in [2, {MAX_POPULATION}]")
+    if job["generations"] is not None and not (_is_int(job["generations"]) and job["generations"] > 0):
+        raise JobError("generations must be a positive integer")
+    if job["seed"] is not None and not _is_int(job["seed"]):
+        raise JobError("seed must be an integer")
+    if job["size"] is not None and not _is_int(job["size"]):
+        raise JobError("size must be an integer")
+
+    profile = DEFAULT_PROFILE
+    if job["profile"]:
+        name = job["profile"]
+        if not isinstance(name, str) or not profiles_dir or not name.replace("_", "").replace("-", "").isalnum():
+            raise JobError(f"unknown profile {name!r}")
+        try:
+            profile = GenerationProfile.from_file(os.path.join(profiles_dir, f"{name}.json"))
+        except FileNotFoundError:
+            raise JobError(f"unknown profile {name!r}")
+    overrides = dict(job["sliders"])
+    if job["symmetry_axis"] is not None:
+        overrides["symmetry_axis"] = job["symmetry_axis"]
+    try:
+        if job["size"] is not None and job["size"] != profile.map_size:
+            profile = GenerationProfile.for_size(job["size"], profile)   # scale-aware sliders
+        profile = GenerationProfile.from_dict({**profile.to_dict(), **overrides})
+    except (TypeError, ValueError) as e:           # GenerationProfile checks every slider's type
+        raise JobError(str(e))
+    if not fitness.MIN_MAP_SIZE <= profile.map_size <= fitness.MAX_MAP_SIZE:
+        raise JobError(f"size must be between {fitness.MIN_MAP_SIZE} and {fitness.MAX_MAP_SIZE}")
+    job["resolved_profile"] = profile.to_dict()
+    return job
+
+
+# ---- worker side (runs in pool processes)
+def _worker_init():
+    # pay the import (and kernel JIT/cache load) cost once per worker, not once per map
+    import ga  # noqa: F401
+    import kernels
+    kernels.warm_up()
+
+
+def _run_job(job_id, job, progress_queue):
+    import ga
+
+    if job["seed"] is not None:
+        random.seed(job["seed"])                    # stamping helpers use the global RNG
+    best = ga.generate(
+        time_budget=job["time_budget"],
+        generations=job["generations"],
+        population_size=job["population_size"],
+        seed=job["seed"],
+        profile=GenerationProfile.from_dict(job["resolved_profile"]),
+        on_generation=lambda info: progress_queue.put((job_id, info)),
+    )
+    return {
+        "grid": [[ga.ID_MAP.get(cell, 0) for cell in row] for row in best.map],
+        "fitness": best.fitness,
+        "breakdown": best.breakdown,
+        "stop_reason": best.stop_reason,
+    }
+
+
+# ---- server side
+class Job:
+    def __init__(self, job_id, params):
+        self.id = job_id
+        self.params = params
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.events = []
+        self.subscribers = []
+        self.created = time.time()
+        self.finished = None
+
+    def publish(self, event):
+        self.events.append(event)
+        for q in self.subscribers:
+            q.put_nowait(event)
+
+    def summary(self):
+        out = {"id": self.id, "status": self.status, "params": self.params, "progress": self.events[-1:]}
+        if self.result:
+            out.update(fitness=self.result["fitness"], stop_reason=self.result["stop_reason"],
+                       breakdown=self.result["breakdown"])
+        if self.error:
+            out["error"] = self.error
+        return out
+
+
+class MapService:
+    def __init__(self, workers=None, maps_dir=None, profiles_dir=None):
+        self.jobs = {}
+        self.maps_dir = maps_dir
+        self.profiles_dir = profiles_dir
+        self._manager = multiprocessing.Manager()
+        self._progress = self._manager.Queue()
+        self._pool = concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_worker_init)
+        self._loop = None
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        threading.Thread(target=self._pump_progress, daemon=True).start()
+
+    def close(self):
+        self._pool.shutdown(cancel_futures=True)
+        self._progress.put(None)
+        self._manager.shutdown()
+
+    def _pump_progress(self):
+        # forwards worker progress (a manager queue) onto the event loop
+        while True:
+            item = self._progress.get()
+            if item is None:
+                return
+            job_id, info = item
+            self._loop.call_soon_threadsafe(self._on_progress, job_id, info)
+
+    def _on_progress(self, job_id, info):
+        job = self.jobs.get(job_id)
+        if job is not None and job.status in ("queued", "running"):
+            job.status = "running"
+            job.publish({"event": "generation", **info})
+
+    def submit(self, params):
+        job = Job(uuid.uuid4().hex[:12], parse_job(params, self.profiles_dir))
+        evict_finished(self.jobs, time.time())
+        self.jobs[job.id] = job
+        future = self._loop.run_in_executor(self._pool, _run_job, job.id, job.params, self._progress)
+        future.add_done_callback(lambda f: self._finish(job, f))
+        return job
+
+    def _finish(self, job, future):
+        if future.cancelled():
+            job.status, job.error = "failed", "cancelled"
+        elif future.exception() is not None:
+            job.status, job.error = "failed", repr(future.exception())
+        else:
+            job.status, job.result = "done", future.result()
+            if self.maps_dir:
+                with open(os.path.join(self.maps_dir, f"{job.id}.txt"), "w", newline="\n") as f:
+                    f.write(grid_to_txt(job.result["grid"]))
+        job.finished = time.time()
+        job.publish({"event": job.status, **({"error": job.error} if job.error else
+                                             {"fitness": job.result["fitness"]})})
+        for q in job.subscribers:
+            q.put_nowait(None)
+        evict_finished(self.jobs, job.finished)
+
+    async def events(self, job):
+        """Replay past events, then follow the job until it finishes."""
+        q = asyncio.Queue()
+        for event in job.events:
+            q.put_nowait(event)
+        if job.status in ("done", "failed"):
+            q.put_nowait(None)
+        else:
+            job.subscribers.append(q)
+        try:
+            while True:
+                event = await q.get()
+                if event is None:
+                    return
+                yield event
+        finally:
+            if q in job.subscribers:
+                job.subscribers.remove(q)
+
+    # ---- HTTP
+    async def handle(self, reader, writer):
+        try:
+            method, path, query, body = await read_request(reader)
+            await self.route(method, path, query, body, writer)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except ValueError as e:
+            await send(writer, 400, {"error": str(e)})
+        finally:
+            writer.close()
+
+    async def route(self, method, path, query, body, writer):
+        parts = [p for p in path.split("/") if p]
+        if method == "POST" and parts == ["jobs"]:
+            job = self.submit(json.loads(body or b"{}"))
+            return await send(writer, 202, {"id": job.id})
+        if method != "GET" or len(parts) < 2:
+            return await send(writer, 404, {"error": "not found"})
+        job = self.jobs.get(parts[1])
+        if job is None:
+            return await send(writer, 404, {"error": "unknown id"})
+        if parts[0] == "jobs" and len(parts) == 2:
+            return await send(writer, 200, job.summary())
+        if parts[0] == "jobs" and parts[2:] == ["events"]:
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\nConnection: close\r\n\r\n")
+            async for event in self.events(job):
+                writer.write((json.dumps(event) + "\n").encode())
+                await writer.drain()
+            return
+        if parts[0] == "maps" and len(parts) == 2:
+            if job.status != "done":
+                return await send(writer, 409, {"error": f"job is {job.status}"})
+            if query.get("format", ["txt"])[0] == "json":
+                grid = job.result["grid"]
+                return await send(writer, 200, {"h": len(grid), "w": len(grid[0]), "grid": grid})
+            return await send(writer, 200, grid_to_txt(job.result["grid"]), "text/plain")
+        return await send(writer, 404, {"error": "not found"})
+
+
+def evict_finished(jobs, now, ttl=FINISHED_JOB_TTL, keep=MAX_FINISHED_JOBS):
+    """Drop finished jobs older than ttl from jobs (id -> Job), then the oldest beyond keep."""
+    finished = sorted((job for job in jobs.values() if job.finished is not None), key=lambda job: job.finished)
+    expired = [job for job in finished if now - job.finished > ttl]
+    for job in expired + finished[len(expired):max(0, len(finished) - keep)]:
+        del jobs[job.id]
+
+
+def grid_to_txt(grid):
+    return "".join(" ".join(str(x) for x in row) + "\n" for row in grid)
+
+
+async def read_request(reader):
+    request_line = (await reader.readline()).decode("latin-1").strip()
+    if not request_line:
+        raise ConnectionError("empty request")
+    method, target, _ = request_line.split(" ", 2)
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode("latin-1").strip()
+        if not line:
+            break
+        key, _, value = line.partition(":")
+        headers[key.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0))
+    body = await reader.readexactly(length) if length else b""
+    url = urlsplit(target)
+    return method.upper(), url.path, parse_qs(url.query), body
+
+
+STATUS_TEXT = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found", 409: "Conflict"}
+
+
+async def send(writer, status, payload, content_type="application/json"):
+    body = (json.dumps(payload) if content_type == "application/json" else payload).encode()
+    writer.write(f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\nContent-Type: {content_type}\r\n"
+                 f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+    await writer.drain()
+
+
+async def serve(host="127.0.0.1", port=8765, unix=None, workers=None, maps_dir=None, profiles_dir=None):
+    service = MapService(workers=workers, maps_dir=maps_dir, profiles_dir=profiles_dir)
+    service.start()
+    if unix:
+        server = await asyncio.start_unix_server(service.handle, path=unix)
+    else:
+        server = await asyncio.start_server(service.handle, host, port)
+    where = unix or f"http://{host}:{port}"
+    print(f"Map service listening on {where}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve map generation jobs from a pool of GA workers.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="listen on a Unix socket instead of TCP")
+    parser.add_argument("--workers", type=int, default=None, help="GA worker processes (default: CPU count)")
+    parser.add_argument("--maps-dir", help="also write finished maps here as <id>.txt")
+    parser.add_argument("--profiles-dir", default=os.path.join(os.path.dirname(__file__), "profiles"),
+                        help="directory of <name>.json generation profiles")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.workers, args.maps_dir, args.profiles_dir))
+    except KeyboardInterrupt:
+        pass
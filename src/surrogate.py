@@ -0,0 +1,119 @@
+"""
+Cheap fitness predictor for screening children before full evaluation.
+
+Features are one pass over the grid: the share of every tile type, plus
+wall and obstacle density in each cell of a regions x regions block grid.
+The model is ridge regression trained online by recursive least squares
+on log-scaled fitness (wall_cluster_score makes raw fitness heavy-tailed),
+so every evaluated map updates it in O(features^2) with no refits.
+
+run_ga(surrogate=Surrogate()) skips evaluating children whose prediction
+is clearly below the current population (see Surrogate.clearly_below)
+and logs the prediction error of every child it does evaluate.
+"""
+import math
+
+from map.tiles import Tile, TILE_NAMES
+
+WALL = TILE_NAMES[Tile.WALL]
+COVER = TILE_NAMES[Tile.COVER]
+WATER = TILE_NAMES[Tile.WATER]
+
+_TILES = tuple(TILE_NAMES.values())
+_OBSTACLES = {WALL, COVER, WATER}
+
+
+def log_fitness(fitness):
+    return math.copysign(math.log1p(abs(fitness)), fitness)
+
+
+class Surrogate:
+    """
+    Online ridge regression on map features.
+    min_samples: evaluations before it is trusted for screening.
+    margin: a child is only discarded when its prediction is more than
+    margin * rmse below the cutoff, so noisy predictions do not prune.
+    forgetting < 1 down-weights old samples as the population moves.
+    """
+
+    def __init__(self, regions=4, ridge=1.0, forgetting=0.995, min_samples=30, margin=1.0):
+        self.regions = regions
+        self.forgetting = forgetting
+        self.min_samples = min_samples
+        self.margin = margin
+        d = len(_TILES) + 2 * regions * regions + 1
+        self.weights = [0.0] * d
+        self.P = [[(1.0 / ridge if i == j else 0.0) for j in range(d)] for i in range(d)]
+        self.samples = 0
+        self.sq_error = 0.0             # running mean of squared log-space error
+        self._abs_error = 0.0           # log-space |error| sum and count since drain_errors()
+        self._checked = 0
+
+    @property
+    def ready(self):
+        return self.samples >= self.min_samples
+
+    @property
+    def rmse(self):
+        return math.sqrt(self.sq_error)
+
+    def features(self, game_map):
+        rows, cols = len(game_map), len(game_map[0])
+        r = self.regions
+        counts = dict.fromkeys(_TILES, 0)
+        walls = [0] * (r * r)
+        obstacles = [0] * (r * r)
+        for y, row in enumerate(game_map):
+            base = (y * r // rows) * r
+            for x, tile in enumerate(row):
+                counts[tile] = counts.get(tile, 0) + 1
+                if tile in _OBSTACLES:
+                    cell = base + x * r // cols
+                    obstacles[cell] += 1
+                    if tile == WALL:
+                        walls[cell] += 1
+        area = rows * cols
+        cell_area = area / (r * r)
+        return ([counts[t] / area for t in _TILES] + [w / cell_area for w in walls]
+                + [o / cell_area for o in obstacles] + [1.0])
+
+    def predict_log(self, x):
+        return sum(w * v for w, v in zip(self.weights, x))
+
+    def predict(self, x):
+        """Predicted fitness (inverse of log_fitness)."""
+        z = self.predict_log(x)
+        return math.copysign(math.expm1(abs(z)), z)
+
+    def update(self, x, fitness):
+        """One recursive least squares step; records the error of the prior prediction."""
+        predicted = self.predict_log(x)
+        y = log_fitness(fitness)
+        err = y - predicted
+        if self.samples:
+            self._abs_error += abs(err)
+            self._checked += 1
+            self.sq_error += (err * err - self.sq_error) / min(self.samples, 50)
+        lam = self.forgetting
+        P = self.P
+        Px = [sum(p * v for p, v in zip(row, x)) for row in P]
+        k = 1.0 / (lam + sum(a * b for a, b in zip(x, Px)))
+        gain = [v * k for v in Px]
+        self.weights = [w + g * err for w, g in zip(self.weights, gain)]
+        self.P = [[(p - gi * pj) / lam for p, pj in zip(row, Px)] for row, gi in zip(P, gain)]
+        self.samples += 1
+
+    def clearly_below(self, x, cutoff):
+        """True if the map with features x is predicted to score under cutoff by more than the margin."""
+        if not self.ready:
+            return False
+        return self.predict_log(x) + self.margin * self.rmse < log_fitness(cutoff)
+
+    def drain_errors(self):
+        """Prediction-vs-actual summary since the last call, for the per-generation log."""
+        if not self._checked:
+            return {}
+        summary = {"surrogate_samples": self.samples, "surrogate_checked": self._checked,
+                   "surrogate_log_mae": self._abs_error / self._checked, "surrogate_rmse": self.rmse}
+        self._abs_error, self._checked = 0.0, 0
+        return summary
@@ -0,0 +1,88 @@
+"""
+Map symmetry shared by generation (ga.py) and scoring (fitness.py).
+
+Grids are lists of rows indexed grid[y][x]. Every mode has a canonical
+half that generation paints and apply_symmetry copies onto the other half:
+
+    vertical    mirror across the vertical centre line   (x -> cols-1-x)
+    horizontal  mirror across the horizontal centre line (y -> rows-1-y)
+    rotational  180 degree point symmetry about the centre (x, y -> cols-1-x, rows-1-y)
+
+vertical and rotational paint the left half, horizontal the top half.
+All whole-grid work is done with row slices and map() so the per-tile
+loop runs in C.
+"""
+from operator import eq
+
+VERTICAL = "vertical"
+HORIZONTAL = "horizontal"
+ROTATIONAL = "rotational"
+AXES = (VERTICAL, HORIZONTAL, ROTATIONAL)
+
+
+def check_axis(axis):
+    if axis not in AXES:
+        raise ValueError(f"unknown symmetry_axis {axis!r}, expected one of {AXES}")
+
+
+def splits_columns(axis):
+    """True when the canonical half is the left half (vertical, rotational)."""
+    return axis != HORIZONTAL
+
+
+def canonical_half(rows, cols, axis):
+    """Inclusive (y0, y1, x0, x1) bounds of the half that generation paints."""
+    if splits_columns(axis):
+        return (0, rows - 1, 0, (cols // 2) - 1)
+    return (0, (rows // 2) - 1, 0, cols - 1)
+
+
+def mirror(x, y, rows, cols, axis):
+    """Partner tile of (x, y)."""
+    if axis == VERTICAL:
+        return cols - 1 - x, y
+    if axis == HORIZONTAL:
+        return x, rows - 1 - y
+    return cols - 1 - x, rows - 1 - y
+
+
+def apply_symmetry(grid, axis):
+    """Overwrite the non-canonical half with the mirrored canonical half, in place."""
+    rows, cols = len(grid), len(grid[0])
+    if axis == HORIZONTAL:
+        for y in range(rows // 2):
+            grid[rows - 1 - y] = list(grid[y])
+        return grid
+    half = cols // 2
+    if axis == VERTICAL:
+        for row in grid:
+            row[cols - half:] = row[half - 1::-1]
+    else:
+        # right half of row rows-1-y is the reversed left half of row y;
+        # only right halves are written, so the order of rows does not matter
+        for y in range(rows):
+            grid[rows - 1 - y][cols - half:] = grid[y][half - 1::-1]
+    return grid
+
+
+def matching_pairs(grid, axis):
+    """Number of canonical-half tiles equal to their mirror partner."""
+    rows, cols = len(grid), len(grid[0])
+    if axis == HORIZONTAL:
+        return sum(sum(map(eq, grid[y], grid[rows - 1 - y])) for y in range(rows // 2))
+    half = cols // 2
+    if axis == VERTICAL:
+        return sum(sum(map(eq, row[:half], row[:cols - half - 1:-1])) for row in grid)
+    return sum(sum(map(eq, grid[y][:half], grid[rows - 1 - y][:cols - half - 1:-1])) for y in range(rows))
+
+
+def pair_count(rows, cols, axis):
+    """matching_pairs() of a perfectly symmetric grid."""
+    if axis == HORIZONTAL:
+        return (rows // 2) * cols
+    return rows * (cols // 2)
+
+
+def best_axis(grid):
+    """(axis, matching_pairs) for the mode the grid is closest to."""
+    return max(((axis, matching_pairs(grid, axis)) for axis in AXES), key=lambda t: t[1])
@@ -0,0 +1,14 @@
+import os
+import random
+import sys
+
+import pytest
+
+# the modules live flat in src/ and import each other by bare name
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "src"))
+
+
+@pytest.fixture(autouse=True)
+def _seed_global_random():
+    # stamping helpers and central_area_score draw from the global RNG
+    random.seed(0)
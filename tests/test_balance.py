@@ -0,0 +1,29 @@
+import random
+
+import balance
+import ga
+from fitness import team_balance_score
+
+
+def test_two_groups_is_difference_over_reached():
+    grid = [["empty"] * 7]
+    result = balance.team_balance(grid, [[0], [6]], {"empty"}, {"all": range(7)})
+    assert result.won["all"] == [3, 3]
+    assert result.contested["all"] == 1
+    assert result.imbalance["all"] == 0.0
+    result = balance.team_balance(grid, [[0], [2]], {"empty"}, {"all": range(7)})
+    assert result.won["all"] == [1, 5]
+    assert result.imbalance["all"] == abs(1 - 5) / 7
+
+
+def test_one_group_winning_everything_is_fully_imbalanced():
+    grid = [["empty"] * 5, ["wall"] * 5, ["empty"] * 5]
+    result = balance.team_balance(grid, [[0], [10], [14]], {"empty"}, {"top": range(5)})
+    assert result.won["top"] == [5, 0, 0]
+    assert abs(result.imbalance["top"] - 1.0) < 1e-9
+
+
+def test_score_varies_on_mirrored_maps():
+    rng = random.Random(1)
+    scores = {team_balance_score(ga.BrawlStarsMap.random_map(rng).map) for _ in range(6)}
+    assert len(scores) > 1
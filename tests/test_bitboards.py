@@ -0,0 +1,23 @@
+import random
+
+import pytest
+
+from bitboards import layout
+
+
+def naive_grow(cells, rows, cols, radius):
+    return {(xx, yy) for (x, y) in cells
+            for yy in range(max(0, y - radius), min(rows, y + radius + 1))
+            for xx in range(max(0, x - radius), min(cols, x + radius + 1))}
+
+
+@pytest.mark.parametrize("cols", range(1, 65))
+def test_grow_matches_naive_dilation(cols):
+    rng = random.Random(cols)
+    rows = 5
+    lay = layout(rows, cols)
+    for radius in range(5):
+        for _ in range(3):
+            cells = {(rng.randrange(cols), rng.randrange(rows)) for _ in range(rng.randint(1, 4))}
+            grown = lay.grow(lay.bits(cells), radius)
+            assert set(lay.positions(grown)) == naive_grow(cells, rows, cols, radius), (cols, radius, cells)
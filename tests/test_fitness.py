@@ -0,0 +1,25 @@
+import random
+
+import ga
+import fitness
+
+
+def test_gameplay_terms_are_rewards_within_bounds():
+    rng = random.Random(4)
+    for _ in range(5):
+        m = ga.BrawlStarsMap.random_map(rng)
+        _, parts = fitness.evaluate_map_fitness(m.map, breakdown=True)
+        counts = fitness.tile_counts(m.map)
+        for name, bound in fitness.TERM_BOUNDS.items():
+            assert 0 <= parts[name] <= bound(m.map, counts) + 1e-6, name
+        assert parts["total"] > 0
+
+
+def test_gameplay_terms_matter_next_to_wall_clusters():
+    rng = random.Random(5)
+    maps = [ga.BrawlStarsMap.random_map(rng).map for _ in range(8)]
+    parts = [fitness.evaluate_map_fitness(m, breakdown=True)[1] for m in maps]
+    for name in ("player_box_distance_score", "close_spawns_barrier_score", "spawn_exposure_score",
+                 "team_balance_score"):
+        values = [p[name] for p in parts]
+        assert max(values) - min(values) >= 0.05 * fitness.gameplay_max(maps[0]), name
@@ -0,0 +1,46 @@
+import random
+
+import pytest
+
+import ga
+import multires
+from map_sliders import DEFAULT_PROFILE
+from surrogate import Surrogate
+
+
+def test_surrogate_without_prune_quantile_never_prunes(monkeypatch):
+    cutoffs = []
+    evaluate = ga.evaluate_map_fitness
+
+    def spy(game_map, **kwargs):
+        cutoffs.append(kwargs.get("cutoff"))
+        return evaluate(game_map, **kwargs)
+
+    monkeypatch.setattr(ga, "evaluate_map_fitness", spy)
+    ga.run_ga(population_size=8, generations=4, seed=1, verbose=False,
+              surrogate=Surrogate(min_samples=1, margin=0.0))
+    assert cutoffs and all(c is None for c in cutoffs)
+
+
+def test_replaced_duplicates_drop_stale_features():
+    rng = random.Random(1)
+    child = ga.BrawlStarsMap.random_map(rng)
+    child.features = Surrogate().features(child.map)
+    replaced = ga._replace_duplicate(child, "mutate", 3, rng)
+    assert replaced.features is None
+
+
+def test_replacements_and_top_up_keep_the_map_class():
+    rng = random.Random(2)
+    layouts = [multires.CoarseMap.random_map(rng, size=(15, 15), profile=multires.coarse_profile(DEFAULT_PROFILE, 4))
+               for _ in range(2)]
+    fresh = ga._replace_duplicate(layouts[0], "random", 0, rng)
+    assert type(fresh) is multires.CoarseMap and (fresh.rows, fresh.cols) == (15, 15)
+    best = ga.run_ga(population_size=6, generations=1, seed=2, initial_population=layouts, verbose=False)
+    assert type(best) is multires.CoarseMap and (best.rows, best.cols) == (15, 15)
+
+
+@pytest.mark.parametrize("q", [0, 1, 2, -0.5])
+def test_prune_quantile_outside_unit_interval_is_rejected(q):
+    with pytest.raises(ValueError):
+        ga.run_ga(population_size=4, generations=1, seed=1, verbose=False, prune_quantile=q)
@@ -0,0 +1,27 @@
+import random
+
+import kernels
+import multires
+from fitness import WALL, SPAWN
+
+
+def test_wall_pieces_are_capped():
+    grid = [[WALL] * 5 for _ in range(4)]
+    piece = multires.wall_pieces(grid, 6)
+    assert len(piece) == 20
+    sizes = [list(piece.values()).count(p) for p in set(piece.values())]
+    assert max(sizes) == 6 and sum(sizes) == 20
+
+
+def test_upsampled_walls_stay_generator_sized():
+    rng = random.Random(6)
+    layout = multires.CoarseMap(size=(15, 15))
+    for row in layout.map:
+        row[:] = [WALL] * 15
+    for x, y in ((1, 1), (3, 1), (5, 1), (1, 4), (4, 4)):
+        layout.map[y][x] = SPAWN
+    layout._apply_symmetry()
+    fine = multires.upsample(layout, rng, size=(60, 60))
+    sizes = kernels.component_sizes(kernels.mask_of(fine.map, (WALL,)), fine.cols)
+    # a piece may join its mirror image across the symmetry line
+    assert max(sizes) <= 2 * fine._dim(10) ** 2
@@ -0,0 +1,56 @@
+import pytest
+
+import service
+from service import JobError, parse_job
+
+
+@pytest.mark.parametrize("params", [
+    [1, 2],
+    "job",
+    {"sliders": [1, 2]},
+    {"sliders": "max_boxes"},
+    {"time_budget": "2"},
+    {"time_budget": 0},
+    {"time_budget": True},
+    {"time_budget": service.MAX_TIME_BUDGET + 1},
+    {"population_size": "30"},
+    {"population_size": 1},
+    {"population_size": 2.5},
+    {"generations": 0},
+    {"generations": "10"},
+    {"seed": [1]},
+    {"profile": 5},
+    {"size": 62.0},
+    {"size": "62"},
+    {"size": True},
+    {"sliders": {"clearance": "x"}},
+    {"sliders": {"max_boxes": 40.5}},
+    {"sliders": {"min_boxes": False}},
+    {"sliders": {"structure_scale": "big"}},
+    {"sliders": {"min_spawn_dist": [1]}},
+    {"sliders": {"unknown_slider": 1}},
+    {"symmetry_axis": 5},
+])
+def test_bad_jobs_raise_job_error(params):
+    with pytest.raises(JobError):
+        parse_job(params)
+
+
+def test_defaults_parse():
+    job = parse_job({"seed": 1, "generations": 3})
+    assert job["population_size"] == service.JOB_DEFAULTS["population_size"]
+    assert job["resolved_profile"]["map_size"] == service.DEFAULT_PROFILE.map_size
+
+
+def test_evict_finished_by_ttl_and_cap():
+    jobs = {}
+    for k in range(6):
+        job = service.Job(str(k), {})
+        job.finished = None if k == 5 else float(k)
+        jobs[job.id] = job
+    service.evict_finished(jobs, now=10.0, ttl=8.0, keep=10)
+    assert sorted(jobs) == ["2", "3", "4", "5"]
+    service.evict_finished(jobs, now=10.0, ttl=8.0, keep=2)
+    assert sorted(jobs) == ["3", "4", "5"]
+    service.evict_finished(jobs, now=10.0, ttl=8.0, keep=5)
+    assert sorted(jobs) == ["3", "4", "5"]
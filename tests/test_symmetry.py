@@ -0,0 +1,48 @@
+import random
+
+import pytest
+
+import ga
+import symmetry
+from fitness import symmetry_score, SPAWN, get_positions
+
+
+def perfect(game_map, axis):
+    rows, cols = len(game_map), len(game_map[0])
+    return symmetry_score(game_map, axis) == 5 * symmetry.pair_count(rows, cols, axis)
+
+
+@pytest.mark.parametrize("axis", symmetry.AXES)
+def test_operators_keep_maps_symmetric(axis):
+    rng = random.Random(2)
+    maps = [ga.BrawlStarsMap.random_map(rng, symmetry_axis=axis) for _ in range(4)]
+    for m in maps:
+        assert perfect(m.map, axis)
+    for _ in range(10):
+        child = rng.choice(maps).crossover(rng.choice(maps), rng)
+        child.mutate(rng)
+        child.feasible_or_repair(rng)
+        assert perfect(child.map, axis)
+
+
+@pytest.mark.parametrize("axis", symmetry.AXES)
+def test_spawn_repair_removes_mirrored_pairs(axis):
+    rng = random.Random(3)
+    m = ga.BrawlStarsMap.random_map(rng, symmetry_axis=axis)
+    # extra spawns on one side only, as a crossover seam can leave them
+    for y in range(m.rows):
+        for x in range(m.cols):
+            if len(get_positions(m.map, SPAWN)) >= 14:
+                break
+            if m.map[y][x] == ga.WALKABLE and (x + y) % 7 == 0:
+                m.map[y][x] = SPAWN
+    m._repair_spawns(rng)
+    assert len(get_positions(m.map, SPAWN)) == ga.SPAWN_COUNT
+    assert perfect(m.map, axis)
+
+
+@pytest.mark.parametrize("axis", symmetry.AXES)
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_run_ga_returns_symmetric_map(axis, seed):
+    best = ga.run_ga(population_size=8, generations=3, seed=seed, symmetry_axis=axis, verbose=False)
+    assert perfect(best.map, axis)
@@ -0,0 +1,47 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("matplotlib")
+
+import ga  # noqa: E402
+from map import visualize  # noqa: E402
+from map.tiles import Tile  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def atlas():
+    return visualize.build_atlas(tile_px=4)
+
+
+def test_render_one_map(atlas):
+    m = ga.BrawlStarsMap.random_map(random.Random(1))
+    img = visualize.render(m, atlas)
+    assert img.shape == (m.rows * 4, m.cols * 4, 3) and img.dtype == np.uint8
+    ids = visualize.to_id_grid(m)
+    assert {Tile.EMPTY, Tile.SPAWN, Tile.SPAWN_B, Tile.BOX} <= set(np.unique(ids).tolist())
+    for tile in np.unique(ids):
+        y, x = np.argwhere(ids == tile)[0]
+        assert (img[y * 4:y * 4 + 4, x * 4:x * 4 + 4] == atlas[tile]).all()
+    # the two spawn sprites differ, so the teams can be told apart
+    assert (atlas[Tile.SPAWN] != atlas[Tile.SPAWN_B]).any()
+
+
+def test_contact_sheet_of_rendered_files(atlas, tmp_path):
+    rng = random.Random(2)
+    paths = []
+    for k in range(3):
+        path = tmp_path / f"map{k}.txt"
+        ga.save_map_txt_strgrid(ga.BrawlStarsMap.random_map(rng).map, str(path))
+        paths.append(str(path))
+    images = [visualize.render(visualize.load_txt(p), atlas) for p in paths]
+    sheet = visualize.contact_sheet(images, columns=2, pad=4)
+    h, w = images[0].shape[:2]
+    assert sheet.shape == (2 * (h + 4) + 4, 2 * (w + 4) + 4, 3)
+    assert (sheet[4:4 + h, 8 + w:8 + 2 * w] == images[1]).all()
+    assert (sheet[8 + h:8 + 2 * h, 8 + w:8 + 2 * w] == 32).all()     # no fourth map: background
+
+    out = visualize.render_contact_sheet(paths, str(tmp_path / "sheet.png"), columns=2, tile_px=4)
+    import matplotlib.image as mpimg
+    assert mpimg.imread(out).shape[:2] == sheet.shape[:2]